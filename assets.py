@@ -0,0 +1,287 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import *
+import hashlib
+import json
+import mmap
+import os
+
+import pygame
+
+
+class AssetManager:
+    def __init__(self, directory: str = "Graphics", cache: str = ".cache"):
+        """
+        Loads the images in directory, once each. The first run packs every PNG into one file of raw RGBA pixels, which
+        later runs memory map instead of decoding PNGs. Images can be loaded on a background thread ahead of being
+        needed.
+        :param str directory: Where the PNGs are.
+        :param str cache: Where the packed file and its index are kept.
+        """
+        self.directory = directory
+        self.cache = cache
+        self.scale = 1.0  # how much every image is scaled by, see set_scale()
+        self.atlas_path = os.path.join(cache, "atlas.rgba")
+        self.index_path = os.path.join(cache, "atlas.json")
+        self.variants_path = os.path.join(cache, "variants.rgba")
+        self.index = None  # name -> [offset, width, height] in the packed file
+        self.variants = {}  # (name, old colour, new colour) -> (recoloured surface, hit mask), see variant()
+        self.variant_index = None  # variant name -> [offset, width, height] in the variants file
+        self.atlas = None  # the memory mapped packed file
+        self.surfaces = {}  # name -> the one surface shared by everything that shows it
+        self.pending = {}  # name -> future of a background load
+        self.lock = Lock()
+        self.loader = ThreadPoolExecutor(1, thread_name_prefix="assets")
+
+    def set_scale(self, scale: float) -> None:
+        """
+        Makes every image come scaled, for a window bigger or smaller than the one the images were drawn for. Each scale
+        is packed into its own file, so an image is only ever scaled once for each scale it's shown at. Has to be set
+        before the first image is loaded.
+        :param float scale: The size to scale by, 1 for the images as they are.
+        :return: None
+        """
+        if self.index is not None:
+            raise RuntimeError("images have already been loaded at another scale")
+        self.scale = scale
+        suffix = "" if scale == 1 else f"@{scale:g}x"
+        self.atlas_path = os.path.join(self.cache, f"atlas{suffix}.rgba")
+        self.index_path = os.path.join(self.cache, f"atlas{suffix}.json")
+        self.variants_path = os.path.join(self.cache, f"variants{suffix}.rgba")
+
+    def sources(self) -> Dict[str, List[int]]:
+        """
+        The PNGs in the directory, with their size and modification time, to tell when the packed file is stale.
+        :return: name -> [size, modification time]
+        """
+        result = {}
+        for file in sorted(os.listdir(self.directory)):
+            if file.endswith(".png"):
+                stat = os.stat(os.path.join(self.directory, file))
+                result[file[:-4]] = [stat.st_size, stat.st_mtime_ns]
+        return result
+
+    def scaled_size(self, size: Tuple[int, int]) -> Tuple[int, int]:
+        """
+        The size an image of size is once scaled.
+        :param Tuple[int, int] size: Its width and height as drawn.
+        :return: Tuple[int, int]
+        """
+        return max(1, round(size[0] * self.scale)), max(1, round(size[1] * self.scale))
+
+    def load_scaled(self, name: str) -> pygame.Surface:
+        """
+        Decodes a PNG, smooth scaled to the scale.
+        :param str name: The image name, ie "Elf".
+        :return: pygame.Surface
+        """
+        image = pygame.image.load(os.path.join(self.directory, f"{name}.png"))
+        if self.scale == 1:
+            return image
+        if image.get_bitsize() not in (24, 32):  # smoothscale only works on 24 and 32 bit images
+            rgba = pygame.Surface(image.get_size(), pygame.SRCALPHA, 32)
+            rgba.blit(image, (0, 0))
+            image = rgba
+        return pygame.transform.smoothscale(image, self.scaled_size(image.get_size()))
+
+    def build(self, sources: Dict[str, List[int]]) -> None:
+        """
+        Packs every image's pixels into the cache file, one after another. Images whose PNG hashes the same as when the
+        file was last packed are copied over from it, so only new or changed images are decoded and scaled.
+        :param Dict[str, List[int]] sources: The output of sources().
+        :return: None
+        """
+        os.makedirs(os.path.dirname(self.atlas_path) or ".", exist_ok=True)
+        old_hashes, old_images, old_atlas = {}, {}, b""
+        try:
+            with open(self.index_path) as file:
+                old = json.load(file)
+            with open(self.atlas_path, "rb") as file:
+                old_atlas = file.read()
+            old_hashes, old_images = old["hashes"], old["images"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        hashes, index = {}, {}
+        with open(self.atlas_path + ".tmp", "wb") as atlas:
+            for name in sources:
+                with open(os.path.join(self.directory, f"{name}.png"), "rb") as file:
+                    hashes[name] = hashlib.sha1(file.read()).hexdigest()
+                if old_hashes.get(name) == hashes[name]:
+                    offset, width, height = old_images[name]
+                    pixels = old_atlas[offset:offset + width * height * 4]
+                else:
+                    image = self.load_scaled(name)
+                    width, height = image.get_size()
+                    pixels = pygame.image.tostring(image, "RGBA")
+                index[name] = [atlas.tell(), width, height]
+                atlas.write(pixels)
+        os.replace(self.atlas_path + ".tmp", self.atlas_path)
+        with open(self.index_path, "w") as file:
+            json.dump({"sources": sources, "scale": self.scale, "hashes": hashes, "images": index}, file)
+        if hashes != old_hashes:
+            # variants of a changed image are stale, they're made again as they're asked for.
+            for path in (self.variants_path, self.variants_path[:-4] + "json"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def open(self) -> None:
+        """
+        Maps the packed file into memory, packing it first if it's missing or any PNG has changed.
+        :return: None
+        """
+        sources = self.sources()
+        try:
+            with open(self.index_path) as file:
+                index = json.load(file)
+            stale = index["sources"] != sources or not os.path.exists(self.atlas_path)
+        except (OSError, ValueError, KeyError):
+            stale = True
+        if stale:
+            self.build(sources)
+            with open(self.index_path) as file:
+                index = json.load(file)
+
+        with open(self.atlas_path, "rb") as file:
+            self.atlas = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = index["images"]
+
+    def decode(self, name: str) -> pygame.Surface:
+        """
+        Makes a surface from an image's pixels in the packed file, converted to the display's format.
+        :param str name: The image name, ie "Elf".
+        :return: pygame.Surface
+        """
+        offset, width, height = self.index[name]
+        pixels = memoryview(self.atlas)[offset:offset + width * height * 4]
+        surface = pygame.image.frombuffer(pixels, (width, height), "RGBA").convert_alpha()
+        pixels.release()  # convert_alpha copied the pixels, so the map isn't needed any more
+        return surface
+
+    def get(self, name: str) -> pygame.Surface:
+        """
+        Gets an image, loading it if it isn't already, or waiting for it if it's loading in the background.
+        :param str name: The image name, ie "Elf".
+        :return: The shared surface, which must not be drawn on.
+        """
+        with self.lock:
+            if self.index is None:
+                self.open()
+            if name in self.surfaces:
+                return self.surfaces[name]
+            future = self.pending.get(name)
+            if future is None:
+                self.surfaces[name] = self.decode(name)
+                return self.surfaces[name]
+        return future.result()
+
+    def variant(self, name: str, old: Tuple[int, int, int], new: Tuple[int, int, int]) \
+            -> Tuple[pygame.Surface, pygame.mask.Mask]:
+        """
+        Gets an image with one colour swapped for another, with a mask of its pixels that aren't black (the border),
+        which are the clickable ones. The colour is swapped and the mask made on the image as drawn, before it's
+        scaled, as scaling blends the colour into its neighbours. At other scales than 1 both are then scaled, and kept
+        in a file next to the packed one, so each is only made once. Only called from the main thread.
+        :param str name: The image name, ie "Elf".
+        :param Tuple[int, int, int] old: The colour to swap out.
+        :param Tuple[int, int, int] new: The colour to put in its place.
+        :return: The surface, which must not be drawn on, and the mask.
+        """
+        key = (name, tuple(old), tuple(new))
+        if key in self.variants:
+            return self.variants[key]
+        image = self.get(name)  # opens the packed file, so the variants file is current
+        if self.scale != 1:
+            self.variants[key] = self.read_variant(f"{name} {key[1]} {key[2]}")
+            if self.variants[key] is not None:
+                return self.variants[key]
+            image = pygame.image.load(os.path.join(self.directory, f"{name}.png")).convert_alpha()
+
+        image = image.copy()
+        px_array = pygame.PixelArray(image)
+        px_array.replace(old, new)
+        px_array.close()
+        mask = pygame.mask.from_surface(image)
+        mask.erase(pygame.mask.from_threshold(image, (0, 0, 0, 255), (1, 1, 1, 255)), (0, 0))
+
+        if self.scale != 1:
+            size = self.scaled_size(image.get_size())
+            image, mask = pygame.transform.smoothscale(image, size), mask.scale(size)
+            self.write_variant(f"{name} {key[1]} {key[2]}", image, mask)
+        self.variants[key] = image, mask
+        return self.variants[key]
+
+    def read_variant(self, key: str) -> Optional[Tuple[pygame.Surface, pygame.mask.Mask]]:
+        """
+        Reads a variant made by an earlier run.
+        :param str key: The variant's name.
+        :return: Its surface and mask, or None if there isn't one.
+        """
+        if self.variant_index is None:
+            try:
+                with open(self.variants_path[:-4] + "json") as file:
+                    self.variant_index = json.load(file)
+            except (OSError, ValueError):
+                self.variant_index = {}
+        if key not in self.variant_index:
+            return None
+        offset, width, height = self.variant_index[key]
+        try:
+            with open(self.variants_path, "rb") as file:
+                file.seek(offset)
+                pixels = file.read(width * height * 5)
+        except OSError:
+            return None
+        if len(pixels) != width * height * 5:
+            return None
+        image = pygame.image.fromstring(pixels[:width * height * 4], (width, height), "RGBA").convert_alpha()
+        # the mask is kept a byte a pixel, 0 where it isn't set, which an 8 bit surface keyed on 0 reads straight back.
+        bits = pygame.image.frombuffer(pixels[width * height * 4:], (width, height), "P")
+        bits.set_colorkey(0)
+        return image, pygame.mask.from_surface(bits)
+
+    def write_variant(self, key: str, image: pygame.Surface, mask: pygame.mask.Mask) -> None:
+        """
+        Adds a variant to the end of the variants file, for later runs.
+        :param str key: The variant's name.
+        :param pygame.Surface image: Its surface.
+        :param pygame.mask.Mask mask: Its mask, the same size.
+        :return: None
+        """
+        index_path = self.variants_path[:-4] + "json"
+        with open(self.variants_path, "ab") as file:
+            offset = file.tell()
+            file.write(pygame.image.tostring(image, "RGBA"))
+            file.write(pygame.image.tostring(mask.to_surface(), "RGBA")[::4])  # white where set, black where not
+        self.variant_index[key] = [offset, image.get_width(), image.get_height()]
+        with open(index_path + ".tmp", "w") as file:
+            json.dump(self.variant_index, file)
+        os.replace(index_path + ".tmp", index_path)
+
+    def preload(self, names: Iterable[str]) -> None:
+        """
+        Starts loading images on a background thread, so they're ready by the time they're needed.
+        :param Iterable[str] names: The image names.
+        :return: None
+        """
+        with self.lock:
+            if self.index is None:
+                self.open()
+            for name in names:
+                if name not in self.surfaces and name not in self.pending:
+                    self.pending[name] = self.loader.submit(self.load_pending, name)
+
+    def load_pending(self, name: str) -> pygame.Surface:
+        """
+        Runs on the background thread, decodes an image preload() asked for.
+        :param str name: The image name.
+        :return: pygame.Surface
+        """
+        surface = self.decode(name)
+        with self.lock:
+            self.surfaces[name] = surface
+            del self.pending[name]
+        return surface
+
+
+assets = AssetManager()  # the one every sprite gets its image from
@@ -0,0 +1,59 @@
+"""
+Times rules.assign_scores on a batch of rolled characters, after checking it against trying all 720 arrangements of
+each character's scores.
+Run from the repository root with: python -m benchmarks.assign [n]
+"""
+from itertools import permutations
+from time import perf_counter
+import sys
+
+import numpy
+
+from generate import generate_chunk
+from rules import apply_racial_bonuses, assign_scores, compile_classes
+
+
+def value(stats: numpy.ndarray, races: numpy.ndarray, classes: numpy.ndarray) -> numpy.ndarray:
+    """
+    What assign_scores() maximises: each ability's weight times its final score, with modifiers counting 1024 times
+    as much as scores, so a better modifier always wins over a tie break.
+    :param numpy.ndarray stats: (..., n, 6) arrangements of scores.
+    :param numpy.ndarray races: (n,) race codes.
+    :param numpy.ndarray classes: (n,) class codes.
+    :return: (..., n) values.
+    """
+    weights = compile_classes().weights[classes].astype(numpy.int64)
+    increases = apply_racial_bonuses(numpy.zeros((len(races), 6), dtype=numpy.uint8), races, weights)
+    final = stats.astype(numpy.int64) + increases
+    return (weights * ((final // 2 - 5) * 1024 + final)).sum(axis=-1)
+
+
+def brute_force(stats: numpy.ndarray, races: numpy.ndarray, classes: numpy.ndarray) -> numpy.ndarray:
+    """
+    The best value of every arrangement of each character's scores.
+    :param numpy.ndarray stats: (n, 6) rolled scores.
+    :param numpy.ndarray races: (n,) race codes.
+    :param numpy.ndarray classes: (n,) class codes.
+    :return: (n,) values.
+    """
+    arrangements = stats[:, list(permutations(range(6)))].transpose(1, 0, 2)  # (720, n, 6)
+    return value(arrangements, races, classes).max(axis=0)
+
+
+def main(n: int = 1_000_000, checked: int = 3_000) -> None:
+    chunk = generate_chunk(0, 0, n)
+    sample = slice(0, checked)
+    assigned = assign_scores(chunk.stats[sample], chunk.races[sample], chunk.classes[sample])
+    assert (numpy.sort(assigned, axis=1) == numpy.sort(chunk.stats[sample], axis=1)).all()
+    assert (value(assigned, chunk.races[sample], chunk.classes[sample]) ==
+            brute_force(chunk.stats[sample], chunk.races[sample], chunk.classes[sample])).all()
+    print(f"matches trying every arrangement on {checked:,} characters")
+
+    start = perf_counter()
+    assign_scores(chunk.stats, chunk.races, chunk.classes)
+    elapsed = perf_counter() - start
+    print(f"assign_scores(): {n:,} characters in {elapsed:.3f}s ({n / elapsed:,.0f} chars/s)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,93 @@
+"""
+Drags a score tile around the dice roller screen, one mouse movement a frame, and reports the frame times and what
+each frame pushes to the display. Dragging has to keep up with FPS.
+Run from the repository root with: python -m benchmarks.drag [frames]
+"""
+from math import cos, sin, tau
+from time import perf_counter
+import sys
+
+import numpy
+import pygame
+
+from benchmarks.headless import click, move, step
+from benchmarks.idle import to_roller
+from main import FPS, FPS_Clock, HEIGHT, WIDTH, Main
+from renderer import renderer
+
+
+def press(pos) -> None:
+    """
+    Queues the left button going down at pos, without letting it go.
+    :param Tuple[int, int] pos: Where the mouse is.
+    :return: None
+    """
+    pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+
+
+def release(pos) -> None:
+    """
+    Queues the left button coming up at pos.
+    :param Tuple[int, int] pos: Where the mouse is.
+    :return: None
+    """
+    pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=1))
+
+
+def path(frames: int) -> list:
+    """
+    A loop around the screen that passes over every box.
+    :param int frames: The number of points.
+    :return: list
+    """
+    return [(int(WIDTH / 2 + 220 * cos(tau * i / frames)), int(HEIGHT / 2 + 230 * sin(tau * i / frames)))
+            for i in range(frames)]
+
+
+def main(frames: int = 600) -> None:
+    program = Main()
+    to_roller(program)
+    roll = program.roll.get_rect().center
+    move(roll)
+    click(roll)
+    while not program.user_stats or program.draw_once:
+        step(program)
+    before = dict(program.user_stats)
+
+    origin, target = program.boxes["Wisdom"], program.boxes["Charisma"]
+    start = origin.tile_rect().center
+    move(start)
+    press(start)
+    step(program)
+
+    times = []
+    pixels = renderer.total_pixels
+    for pos in path(frames):
+        move(pos)
+        began = perf_counter()
+        step(program)
+        times.append(perf_counter() - began)
+    pixels = (renderer.total_pixels - pixels) / frames
+
+    # the same again at the frame clock's pace, to see the frame rate actually held.
+    for pos in path(FPS):
+        move(pos)
+        step(program)
+        FPS_Clock.tick(FPS)
+    fps = FPS_Clock.get_fps()
+
+    drop = target.get_rect().center
+    move(drop)
+    release(drop)
+    step(program)
+    assert program.user_stats["Wisdom"] == before["Charisma"] and program.user_stats["Charisma"] == before["Wisdom"]
+
+    times = numpy.array(times) * 1000
+    p50, p95, p99 = numpy.percentile(times, [50, 95, 99])
+    print(f"{frames} drag frames: p50 {p50:.3f} ms, p95 {p95:.3f} ms, p99 {p99:.3f} ms, max {times.max():.3f} ms")
+    print(f"{pixels:,.0f} pixels pushed per frame ({100 * pixels / (WIDTH * HEIGHT):.1f}% of the screen), "
+          f"{fps:.1f} FPS at a target of {FPS}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 600)
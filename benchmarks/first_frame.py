@@ -0,0 +1,72 @@
+"""
+Times from an empty process to the race screen's first frame on the display, each run in a fresh interpreter. Importing
+pygame takes the same time whichever way, so the time after it is shown too.
+    before  every PNG decoded synchronously, one load per sprite, as Main used to do
+    cold    Main with no packed asset file yet, so it's built first
+    warm    Main with the packed asset file already built
+Run from the repository root with: python -m benchmarks.first_frame [runs]
+"""
+from typing import *
+import os
+import subprocess
+import sys
+
+# Main as it was before the asset manager: every sprite decodes its own PNG, and every image loads up front.
+BEFORE = """
+from time import perf_counter
+start = perf_counter()
+import pygame
+imported = perf_counter()
+import benchmarks.headless
+from benchmarks.headless import step
+from assets import assets
+assets.get = lambda name: pygame.image.load(f"Graphics/{name}.png").convert_alpha()
+assets.preload = lambda names: None
+from main import Main
+program = Main()
+program.load_classes()
+step(program)
+print(perf_counter() - start, perf_counter() - imported)
+"""
+
+AFTER = """
+from time import perf_counter
+start = perf_counter()
+import pygame
+imported = perf_counter()
+import benchmarks.headless
+from benchmarks.headless import step
+from main import Main
+step(Main())
+print(perf_counter() - start, perf_counter() - imported)
+"""
+
+
+def run(code: str, runs: int, clear_cache: bool = False) -> Tuple[float, float]:
+    """
+    Runs a snippet in fresh interpreters, and takes the best times it prints.
+    :param str code: The snippet.
+    :param int runs: How many times to run it.
+    :param bool clear_cache: Whether to delete the packed asset file before each run.
+    :return: Seconds in total, and seconds after pygame was imported.
+    """
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy")
+    times = []
+    for _ in range(runs):
+        if clear_cache:
+            for file in (".cache/atlas.rgba", ".cache/atlas.json"):
+                if os.path.exists(file):
+                    os.remove(file)
+        output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+        times.append([float(time) for time in output.stdout.strip().splitlines()[-1].split()])
+    return min(time[0] for time in times), min(time[1] for time in times)
+
+
+def main(runs: int = 5) -> None:
+    for name, code, clear_cache in (("before", BEFORE, False), ("cold", AFTER, True), ("warm", AFTER, False)):
+        total, after_import = run(code, runs, clear_cache)
+        print(f"{name:>6}: {total * 1000:6.1f} ms, {after_import * 1000:6.1f} ms of it after importing pygame")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,166 @@
+"""
+Replays mouse traces through the race, class and dice roller screens under SDL's dummy video driver, and reports frame
+times and drawing counts per screen.
+
+python -m benchmarks.frames                      replay the built in scripted trace
+python -m benchmarks.frames --trace trace.json   replay a recorded trace
+python -m benchmarks.frames --record trace.json  play with a real window, and save what the mouse did
+python -m benchmarks.frames --profile out.json   also break frames into phases, and save a Chrome trace
+
+A trace is a JSON list with one entry per frame, each a list of ["move", x, y] or ["click", x, y] actions.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+from typing import *
+import json
+import os
+import sys
+
+import numpy
+
+
+def lerp(start: Tuple[int, int], end: Tuple[int, int], frames: int) -> List[list]:
+    """
+    Moves the mouse in a straight line, one movement per frame.
+    :param Tuple[int, int] start: Where the mouse starts.
+    :param Tuple[int, int] end: Where the mouse ends up.
+    :param int frames: How many frames it takes.
+    :return: The frames of the trace.
+    """
+    return [[["move", round(start[0] + (end[0] - start[0]) * i / frames),
+              round(start[1] + (end[1] - start[1]) * i / frames)]] for i in range(1, frames + 1)]
+
+
+def scripted_trace(program) -> List[list]:
+    """
+    Sweeps the mouse over every race, picks one, sweeps over every class, picks one, then rolls the dice.
+    :param Main program: A fresh program, used to find where everything is.
+    :return: The trace.
+    """
+    from benchmarks.hover_latency import target
+
+    trace = []
+    pos = (0, 0)
+    for image in program.races:
+        trace += lerp(pos, target(image), 10)
+        pos = target(image)
+    trace += [[["click", *pos]], []]
+
+    # the classes only get their places once the class screen is drawn, in a grid 3 wide from x = 300. Until then
+    # they're all at (0, 0), so target() gives the point within each image.
+    program.load_classes()
+    for index, image in enumerate(program.classes):
+        point = (300 + 100 * (index % 3) + target(image)[0], 187 * (index // 3) + target(image)[1])
+        trace += lerp(pos, point, 10)
+        pos = point
+    trace += [[["click", *pos]], []]
+
+    roll = (300, 315)  # the middle of the roll button
+    for _ in range(3):
+        trace += lerp(pos, roll, 15) + [[["click", *roll]], []] + lerp(roll, (100, 600), 15)
+        pos = (100, 600)
+    return trace
+
+
+def replay(program, trace: List[list]) -> Dict[str, dict]:
+    """
+    Plays a trace back a frame at a time, timing each frame.
+    :param Main program: The program to play it on.
+    :param List[list] trace: The trace.
+    :return: Screen name -> frame times in milliseconds, and counts of updates, blits, rects and pixels.
+    """
+    from benchmarks.headless import click, move, step
+    from renderer import renderer
+
+    results = {}
+    for actions in trace:
+        for action, x, y in actions:
+            (move if action == "move" else click)((x, y))
+
+        counts = (renderer.updates, renderer.blits, renderer.total_rects, renderer.total_pixels)
+        start = perf_counter()
+        step(program)
+        elapsed = perf_counter() - start
+
+        screen = results.setdefault(program.screen(), {"times": [], "updates": 0, "blits": 0, "rects": 0,
+                                                        "pixels": 0})
+        screen["times"].append(elapsed * 1000)
+        for key, before, after in zip(("updates", "blits", "rects", "pixels"), counts,
+                                      (renderer.updates, renderer.blits, renderer.total_rects, renderer.total_pixels)):
+            screen[key] += after - before
+    return results
+
+
+def report(results: Dict[str, dict]) -> str:
+    """
+    One line per screen.
+    :param Dict[str, dict] results: The output of replay().
+    :return: str
+    """
+    lines = [f"{'screen':>7} {'frames':>6} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'updates':>8} {'blits':>6} "
+             f"{'rects':>6} {'pixels/frame':>12}"]
+    for screen, result in results.items():
+        p50, p95, p99 = numpy.percentile(result["times"], (50, 95, 99))
+        frames = len(result["times"])
+        lines.append(f"{screen:>7} {frames:>6} {p50:>7.3f} {p95:>7.3f} {p99:>7.3f} {result['updates']:>8} "
+                     f"{result['blits']:>6} {result['rects']:>6} {result['pixels'] / frames:>12,.0f}")
+    return "\n".join(lines)
+
+
+def record(path: str) -> None:
+    """
+    Runs the program in a real window, saving the mouse movements and clicks of each frame to a trace.
+    :param str path: Where to save the trace.
+    :return: None
+    """
+    import pygame
+    from main import Main
+
+    trace = []
+
+    class Recorder(Main):
+        def check_events(self, event=None):
+            events = ([] if event is None or event.type == pygame.NOEVENT else [event]) + pygame.event.get()
+            trace.append([["move" if e.type == pygame.MOUSEMOTION else "click", *e.pos] for e in events
+                          if e.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONUP)])
+            for e in events:
+                pygame.event.post(e)
+            super().check_events()
+
+    Recorder().run(adaptive=False)
+    with open(path, "w") as file:
+        json.dump(trace, file)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--trace", help="a recorded trace to replay")
+    parser.add_argument("--record", help="play in a real window and save the trace here")
+    parser.add_argument("--profile", metavar="TRACE", help="also time each phase, and save a Chrome trace here")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record(args.record)
+        return
+
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    import benchmarks.headless  # noqa: F401, sets up the dummy driver before main is imported
+    from main import Main
+    from profiler import profiler
+
+    profiler.enabled = bool(args.profile)
+    program = Main()
+    if args.trace:
+        with open(args.trace) as file:
+            trace = json.load(file)
+    else:
+        trace = scripted_trace(program)
+    print(report(replay(program, trace)))
+
+    if args.profile:
+        profiler.chrome_trace(args.profile)
+        print(profiler.summary())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
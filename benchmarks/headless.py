@@ -0,0 +1,44 @@
+"""
+Runs Main without a real display, for the benchmarks.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from profiler import profiler
+from renderer import renderer
+
+# the dummy video driver never gives a window mouse focus, which Select.hover needs before anything is selectable.
+pygame.mouse.get_focused = lambda: True
+
+
+def move(pos) -> None:
+    """
+    Queues a mouse movement, as if the user had moved the mouse to pos.
+    :param Tuple[int, int] pos: Where the mouse moves to.
+    :return: None
+    """
+    pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0)))
+
+
+def click(pos) -> None:
+    """
+    Queues a left click at pos.
+    :param Tuple[int, int] pos: Where the mouse clicks.
+    :return: None
+    """
+    pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+    pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=1))
+
+
+def step(program) -> None:
+    """
+    Runs one frame of the program, without waiting on the frame clock.
+    :param Main program: The program.
+    :return: None
+    """
+    with profiler.phase("frame"):
+        program.process()
+        renderer.flush()
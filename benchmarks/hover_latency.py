@@ -0,0 +1,61 @@
+"""
+Measures how many frames it takes for a hover highlight to show after the mouse moves onto an image, on the race and
+class screens. Run from the repository root with: python -m benchmarks.hover_latency
+"""
+from benchmarks.headless import click, move, step
+from main import Main
+
+
+def target(image) -> tuple:
+    """
+    A point on the screen over the clickable part of an image, as close to its centre as possible. The centre itself
+    can be on black, which isn't clickable.
+    :param Select image: The image.
+    :return: Tuple[int, int]
+    """
+    mask = next(iter(image.variants.values()))[0][1]
+    width, height = mask.get_size()
+    x, y = min(((x, y) for x in range(width) for y in range(height) if mask.get_at((x, y))),
+               key=lambda point: (point[0] - width // 2) ** 2 + (point[1] - height // 2) ** 2)
+    return image.get_rect().left + x, image.get_rect().top + y
+
+
+def frames_to_highlight(program: Main, images: list, limit: int = 100) -> list:
+    """
+    Moves the mouse onto each image in turn, and counts the frames from Main seeing the new mouse position until the
+    image is selectable.
+    :param Main program: The program, on the screen the images belong to.
+    :param list images: The Select objects to hover over.
+    :param int limit: The most frames to wait for one image.
+    :return: The number of frames for each image.
+    """
+    results = []
+    for image in images:
+        point = target(image)
+        move(point)
+        while program.mouse_pos != point:
+            step(program)
+
+        for frame in range(1, limit + 1):
+            step(program)
+            if image.is_selectable():
+                break
+        results.append(frame)
+    return results
+
+
+def main() -> None:
+    program = Main()
+    races = frames_to_highlight(program, program.races)
+    print(f"race screen ({len(races)} images):   worst {max(races)} frame(s), mean {sum(races) / len(races):.2f}")
+
+    click(target(program.races[-1]))  # the last race hovered over is still selectable
+    while not program.choose_class:
+        step(program)
+    classes = frames_to_highlight(program, program.classes)
+    print(f"class screen ({len(classes)} images): worst {max(classes)} frame(s), "
+          f"mean {sum(classes) / len(classes):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Compares CPU use and wakeups of the fixed 60 FPS loop against adaptive pacing, with the mouse resting on the race
+screen and the dice roller screen. SDL's dummy video driver can't block on events, so pygame.event.wait polls there
+and the adaptive CPU figures are higher than they are with a real display.
+Run from the repository root with: python -m benchmarks.idle [seconds]
+"""
+import sys
+
+import pygame
+
+from benchmarks.headless import click, move, step
+from benchmarks.hover_latency import target
+from main import Main
+
+
+def to_roller(program: Main) -> None:
+    """
+    Clicks through the race and class screens, and leaves the mouse off every button.
+    :param Main program: The program, on the race screen.
+    :return: None
+    """
+    for screen in ("races", "classes"):
+        images = getattr(program, screen)  # the classes are only made once the class screen is shown
+        move(target(images[0]))
+        click(target(images[0]))
+        step(program)
+    move((5, 700))
+    step(program)
+
+
+def measure(adaptive: bool, roller: bool, seconds: float) -> str:
+    """
+    Runs the main loop on one screen for a while.
+    :param bool adaptive: Whether to use adaptive pacing.
+    :param bool roller: True for the dice roller screen, False for the race screen.
+    :param float seconds: How long to run for.
+    :return: The pacing report.
+    """
+    program = Main()
+    if roller:
+        to_roller(program)
+    else:
+        move(target(program.races[4]))  # resting over an image
+        step(program)
+    pygame.time.set_timer(pygame.QUIT, int(seconds * 1000), 1)
+    program.run(adaptive)
+    return program.pacing_report()
+
+
+def main(seconds: float = 2) -> None:
+    for roller in (False, True):
+        for adaptive in (False, True):
+            print(f"{'adaptive' if adaptive else 'fixed'}:")
+            print(measure(adaptive, roller, seconds))
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 2)
@@ -0,0 +1,32 @@
+"""
+Floods the queue with mouse movements and a click every frame, then shows how long the clicks waited to be handled.
+Every event is stamped with the time it was posted.
+Run from the repository root with: python -m benchmarks.input_latency
+"""
+import pygame
+
+from benchmarks.headless import step
+from events import ticks
+from main import Main
+
+
+def main(frames: int = 120, moves: int = 50) -> None:
+    program = Main()
+    step(program)
+    handled_late = 0
+    for frame in range(frames):
+        for i in range(moves):
+            pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=(i, i), rel=(1, 1), buttons=(0, 0, 0),
+                                                 time=ticks()))
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(1, 1), button=1,
+                                             time=ticks()))
+        step(program)
+        handled_late += bool(pygame.event.peek())  # anything still queued waits for another frame
+
+    print(f"{frames} frames of {moves} movements and a click: {handled_late} frame(s) left events queued")
+    print(f"p50 under {program.latency.percentile(50)} ms, p99 under {program.latency.percentile(99)} ms")
+    print(program.latency.report())
+
+
+if __name__ == "__main__":
+    main()
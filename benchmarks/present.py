@@ -0,0 +1,42 @@
+"""
+Counts what each frame pushes to the display while hovering over the race and class screens. Every marked rect used to
+be its own pygame.display.update call. Run from the repository root with: python -m benchmarks.present
+"""
+from benchmarks.headless import click, move, step
+from benchmarks.hover_latency import target
+from main import Main
+from renderer import renderer
+
+
+def sweep(program: Main, images: list) -> None:
+    """
+    Moves the mouse over every image, a frame each, then reports what was pushed.
+    :param Main program: The program, on the screen the images belong to.
+    :param list images: The Select objects to hover over.
+    :return: None
+    """
+    frames, marked, rects, pixels = renderer.frames, renderer.marked, renderer.total_rects, renderer.total_pixels
+    for image in images:
+        move(target(image))
+        step(program)
+        step(program)
+    frames = renderer.frames - frames
+    print(f"  {(renderer.marked - marked) / frames:.2f} draws -> {(renderer.total_rects - rects) / frames:.2f} "
+          f"display rects, {(renderer.total_pixels - pixels) / frames:,.0f} pixels per frame")
+
+
+def main() -> None:
+    program = Main()
+    step(program)
+    print("race screen:")
+    sweep(program, program.races)
+
+    click(target(program.races[-1]))
+    while not program.choose_class:
+        step(program)
+    print("class screen:")
+    sweep(program, program.classes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares StatsGenerator.roll_batch against calling StatsGenerator.roll in a loop.
+Run from the repository root with: python -m benchmarks.roll_batch [n]
+"""
+from time import perf_counter
+import sys
+
+import numpy
+
+from character import StatsGenerator
+
+
+def per_call(n: int) -> float:
+    """
+    Times n separate calls to StatsGenerator.roll.
+    :param int n: The number of characters to roll.
+    :return: Seconds taken.
+    """
+    generator = StatsGenerator()
+    start = perf_counter()
+    for _ in range(n):
+        generator.roll()
+    return perf_counter() - start
+
+
+def batched(n: int) -> float:
+    """
+    Times one call to StatsGenerator.roll_batch for n characters.
+    :param int n: The number of characters to roll.
+    :return: Seconds taken.
+    """
+    generator = StatsGenerator()
+    rng = numpy.random.default_rng(0)
+    start = perf_counter()
+    generator.roll_batch(n, rng)
+    return perf_counter() - start
+
+
+def seeded(n: int) -> float:
+    """
+    Times one call to StatsGenerator.roll_batch for n characters, drawing from the seed's CounterRNG.
+    :param int n: The number of characters to roll.
+    :return: Seconds taken.
+    """
+    generator = StatsGenerator(seed=0)
+    start = perf_counter()
+    generator.roll_batch(n)
+    return perf_counter() - start
+
+
+def main(n: int = 1_000_000) -> None:
+    loop_time = per_call(n)
+    batch_time = batched(n)
+    seeded_time = seeded(n)
+    print(f"roll() loop:  {n} characters in {loop_time:.3f}s ({n / loop_time:,.0f} chars/s)")
+    print(f"roll_batch(): {n} characters in {batch_time:.3f}s ({n / batch_time:,.0f} chars/s)")
+    print(f"seeded:       {n} characters in {seeded_time:.3f}s ({n / seeded_time:,.0f} chars/s)")
+    print(f"speed up:     {loop_time / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,77 @@
+"""
+Times from an empty process to the race screen's first frame at other scales, each run in a fresh interpreter.
+    cold     no packed asset or variants file for the scale yet, so every image and hover variant is scaled first
+    touched  every PNG's modified time changed but not its contents, so the packed file is rebuilt without scaling
+    warm     the packed asset file for the scale already built
+Run from the repository root with: python -m benchmarks.scaling [runs]
+"""
+from typing import *
+import os
+import subprocess
+import sys
+
+CODE = """
+from time import perf_counter
+start = perf_counter()
+import benchmarks.headless
+from benchmarks.headless import step
+import main
+main.configure({scale})
+program = main.Main()
+step(program)
+print(perf_counter() - start, *program.surface.get_size())
+"""
+
+
+def run(scale: float, runs: int, setup: Callable[[], None]) -> Tuple[float, Tuple[int, int]]:
+    """
+    Starts the program at a scale in fresh interpreters, and takes the best time.
+    :param float scale: The scale passed to main.configure().
+    :param int runs: How many times to start it.
+    :param Callable[[], None] setup: Called before each start.
+    :return: Seconds to the first frame, and the window's size.
+    """
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy")
+    times = []
+    for _ in range(runs):
+        setup()
+        output = subprocess.run([sys.executable, "-c", CODE.format(scale=scale)], env=env, capture_output=True,
+                                text=True, check=True)
+        seconds, width, height = output.stdout.strip().splitlines()[-1].split()
+        times.append(float(seconds))
+    return min(times), (int(width), int(height))
+
+
+def clear(scale: float) -> Callable[[], None]:
+    """
+    Makes a setup that deletes the packed asset and variants files of a scale.
+    :param float scale: The scale.
+    :return: Callable[[], None]
+    """
+    def setup() -> None:
+        for name in ("atlas", "variants"):
+            for extension in ("rgba", "json"):
+                path = f".cache/{name}@{scale:g}x.{extension}"
+                if os.path.exists(path):
+                    os.remove(path)
+    return setup
+
+
+def touch() -> None:
+    """
+    Changes every PNG's modified time, as a checkout would.
+    :return: None
+    """
+    for name in os.listdir("Graphics"):
+        os.utime(os.path.join("Graphics", name))
+
+
+def main(runs: int = 3) -> None:
+    for scale in (1.5, 2.0):
+        for name, setup in (("cold", clear(scale)), ("touched", touch), ("warm", lambda: None)):
+            seconds, size = run(scale, runs, setup)
+            print(f"x{scale:g} {size[0]}x{size[1]} {name:>7}: {seconds * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,90 @@
+"""
+Load tests service.py on localhost: many clients asking for new characters at once, with and without batching.
+Run from the repository root with: python -m benchmarks.service [clients] [seconds]
+"""
+from time import perf_counter
+import asyncio
+import socket
+import subprocess
+import sys
+
+import numpy
+
+PATHS = (b"/character", b"/character", b"/party?size=4", b"/roll?count=6")  # what each client cycles through
+
+
+def free_port() -> int:
+    """
+    A port nothing is listening on.
+    :return: int
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+async def client(port: int, until: float, latencies: list) -> None:
+    """
+    Sends requests one after another on one connection until the time is up.
+    :param int port: The service's port.
+    :param float until: perf_counter() to stop at.
+    :param list latencies: Where the seconds each request took are added.
+    :return: None
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    sent = 0
+    while perf_counter() < until:
+        start = perf_counter()
+        writer.write(b"GET " + PATHS[sent % len(PATHS)] + b" HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+        await reader.readexactly(length)
+        latencies.append(perf_counter() - start)
+        sent += 1
+    writer.close()
+
+
+async def load(port: int, clients: int, seconds: float) -> list:
+    """
+    Runs the clients together.
+    :param int port: The service's port.
+    :param int clients: How many connections send requests at once.
+    :param float seconds: How long to send requests for.
+    :return: The latency of every request.
+    """
+    latencies = []
+    until = perf_counter() + seconds
+    await asyncio.gather(*(client(port, until, latencies) for _ in range(clients)))
+    return latencies
+
+
+def measure(window: float, clients: int, seconds: float) -> str:
+    """
+    Starts the service in its own process, and loads it.
+    :param float window: The service's batching window, 0 to not batch.
+    :param int clients: How many connections send requests at once.
+    :param float seconds: How long to send requests for.
+    :return: A line of results.
+    """
+    port = free_port()
+    service = subprocess.Popen([sys.executable, "service.py", "--port", str(port), "--seed", "0", "--window",
+                                str(window)], stdout=subprocess.PIPE, text=True)
+    try:
+        service.stdout.readline()  # it prints once it's listening
+        latencies = numpy.array(asyncio.run(load(port, clients, seconds))) * 1000
+    finally:
+        service.terminate()
+        service.wait()
+    p50, p95, p99 = numpy.percentile(latencies, [50, 95, 99])
+    return f"window {window * 1000:>4.1f} ms: {len(latencies) / seconds:>8,.0f} requests/s, p50 {p50:.2f} ms, " \
+           f"p95 {p95:.2f} ms, p99 {p99:.2f} ms, max {latencies.max():.2f} ms"
+
+
+def main(clients: int = 64, seconds: float = 5.0) -> None:
+    print(f"{clients} clients for {seconds}s each")
+    for window in (0.0, 0.001, 0.002):
+        print(measure(window, clients, seconds))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
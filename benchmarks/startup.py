@@ -0,0 +1,39 @@
+"""
+Times startup in fresh interpreters: importing the core and the GUI, starting pygame the old way (pygame.init()) against
+only the subsystems the GUI uses, and the time until the first frame is on the window.
+Run from the repository root with: python -m benchmarks.startup [runs]
+"""
+import os
+import subprocess
+import sys
+
+SNIPPETS = {
+    "import character": "import character",
+    "import main": "import main",
+    "pygame.init()": "import pygame\nstart = perf_counter()\npygame.init()",
+    "init_pygame()": "import main\nstart = perf_counter()\nmain.init_pygame()",
+    "time to window": "import benchmarks.headless\nfrom benchmarks.headless import step\nfrom main import Main\n"
+                      "step(Main())",
+}
+
+
+def time_snippet(code: str, runs: int) -> float:
+    """
+    Runs a snippet in fresh interpreters, timing from start (which the snippet may reset) to its end.
+    :param str code: The snippet.
+    :param int runs: How many times to run it.
+    :return: The best time in seconds.
+    """
+    script = f"from time import perf_counter\nstart = perf_counter()\n{code}\nprint(perf_counter() - start)"
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy")
+    return min(float(subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True,
+                                    check=True).stdout.strip().splitlines()[-1]) for _ in range(runs))
+
+
+def main(runs: int = 5) -> None:
+    for name, code in SNIPPETS.items():
+        print(f"{name:>16}: {time_snippet(code, runs) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
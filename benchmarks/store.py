@@ -0,0 +1,78 @@
+"""
+Measures what a character costs to keep, as a dict, a Character and a row of a CharacterBatch, and how long a store
+file takes to write, open and query compared with scanning every character.
+Run from the repository root with: python -m benchmarks.store [n]
+"""
+from time import perf_counter
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import numpy
+
+from generate import generate_chunk, records
+from store import CharacterStore, write_store
+
+QUERY = {"race": "Elf", "dnd_class": "Wizard", "minimums": {"Intelligence": 15, "Dexterity": 14}}
+
+
+def measure(make, count: int) -> float:
+    """
+    The bytes allocated per item while making count items.
+    :param make: Called with no arguments, returns the items.
+    :param int count: The number of items made.
+    :return: float
+    """
+    tracemalloc.start()
+    kept = make()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size / count
+
+
+def memory(count: int = 100_000) -> None:
+    chunk = generate_chunk(0, 0, count)
+    dicts = measure(lambda: list(records(chunk)), count)
+    characters = measure(lambda: [chunk.character(offset) for offset in range(count)], count)
+    columns = measure(lambda: generate_chunk(0, 0, count), count)
+    print(f"bytes per character: dict {dicts:.0f}, Character {characters:.0f}, CharacterBatch {columns:.1f}")
+
+
+def scan(store: CharacterStore) -> numpy.ndarray:
+    """
+    QUERY without the indexes, reading every character.
+    :param CharacterStore store: The store.
+    :return: The ids found.
+    """
+    races, classes, stats = (numpy.asarray(store.columns[name]) for name in ("races", "classes", "stats"))
+    found = (races == 2) & (classes == 11) & (stats[:, 4] >= 15) & (stats[:, 1] >= 14)
+    return numpy.flatnonzero(found) + store.first
+
+
+def main(n: int = 2_000_000) -> None:
+    memory()
+    path = os.path.join(tempfile.mkdtemp(), "characters.store")
+    chunks = (generate_chunk(0, start, min(100_000, n - start)) for start in range(0, n, 100_000))
+    start = perf_counter()
+    write_store(path, chunks, n)
+    print(f"write: {n} characters in {perf_counter() - start:.2f}s, {os.path.getsize(path) / n:.1f} bytes each")
+
+    start = perf_counter()
+    store = CharacterStore(path)
+    print(f"open:  {(perf_counter() - start) * 1000:.2f} ms")
+
+    start = perf_counter()
+    found = store.select(**QUERY)
+    indexed = perf_counter() - start
+    start = perf_counter()
+    scanned = scan(store)
+    full = perf_counter() - start
+    assert numpy.array_equal(found, scanned)
+    print(f"query: {len(found)} found, {indexed * 1000:.2f} ms with the indexes, {full * 1000:.2f} ms scanning")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+from random import randrange
+from typing import *
+
+if TYPE_CHECKING:
+    import numpy
+
+# numpy is only imported by the functions that use it, so importing this module stays quick for roll().
+
+RACES = ("Dragonborn", "Dwarf", "Elf", "Gnome", "Half-elf", "Half-orc", "Halfling", "Human", "Tiefling")
+CLASSES = ("Barbarian", "Bard", "Cleric", "Druid", "Fighter", "Monk", "Paladin", "Ranger", "Rogue", "Sorcerer",
+           "Warlock", "Wizard")
+
+RACE_DESCRIPTIONS = {"Dragonborn": "Born of dragons, as their name proclaims, the dragonborn walk proudly "
+                                   "through a world that greets them with fearful incomprehension. Shaped "
+                                   "by draconic gods or the dragons themselves, dragonborn originally "
+                                   "hatched from dragon eggs as a unique race, combining the best "
+                                   "attributes of dragons and humanoids. Some dragonborn are faithful "
+                                   "servants to true dragons, others form the ranks of soldiers in great "
+                                   "wars, and still others find themselves adrift, with no clear calling "
+                                   "in life. Racial traits include your Strength score increasing by 2, "
+                                   "and your Charisma score increasing by 1.",
+
+                     "Dwarf": "The members of this race are hearty and steadfast, standing about 4-1/2 "
+                              "feet tall but powerfully built and extremely broad. They have a strong "
+                              "connection to mountains and rocky places. They can live to be more than "
+                              "400 years old. In game terms, dwarves receive a +2 to Constitution. "
+                              "They also receive bonuses against poison, spells, and magical effects. "
+                              "Dwarves also have darkvision, the ability to see up to 60 feet in the dark.",
+
+                     "Human": "These are people just like you and us. They are adaptable, flexible, "
+                              "and extremely ambitious. Compared to the other races, humans are "
+                              "relatively short-lived. In game terms, humans get an extra feat on all "
+                              "their stats.",
+
+                     "Elf": "Elves have a strong connection to the natural world, especially woodlands. "
+                              "They can live to be more than 700 years old. Known for being artists of "
+                              "both song and magic, elves have an affinity for spell-casting and lore. "
+                              "They stand about 5-1/2 feet tall, appearing graceful and frail. Elves "
+                              "receive a +2 to Dexterity. They are immune to sleep effects and receive "
+                              "a bonus against enchantment spells. Elves have low-light vision and a "
+                              "racial bonus on Listen, Search, and Spot checks.",
+
+                     "Halfling": "The members of this race are clever and capable — much more so than "
+                                 "their small size might indicate. Standing about 3 feet tall, with slim, "
+                                 "muscular builds, halflings are athletic and outgoing. Curious to a fault "
+                                 "and usually with a daring to match, halflings love to explore. They tend "
+                                 "to live well past 100. Halflings receive a +2 Dexterity to reflect their "
+                                 "small statures. They also receive bonuses to Climb, Jump, Listen, and "
+                                 "Move Silently checks, as well as a bonus to all saving throws due to "
+                                 "their fearlessness and ability to avoid damage.",
+
+                     "Tiefling": "Tieflings tended to have an unsettling air about them, and most people "
+                                 "were uncomfortable around them, whether they were aware of the "
+                                 "tiefling's unsavory ancestry or not. While some looked like normal "
+                                 "humans, most retained physical characteristics derived from their "
+                                 "ancestor, with the most common such features being horns, "
+                                 "non-prehensile tails, and pointed teeth. Some tieflings also had eyes "
+                                 "that were solid orbs of black, red, white, silver, or gold, while "
+                                 "others had eyes more similar to those of humans. Other, more unusual "
+                                 "characteristics included a sulfurous odor, cloven feet, or a general "
+                                 "aura of discomfort they left on others. In game terms, get an "
+                                 "additional +2 in their charisma stat and a +1 in their intelligence.",
+
+                     "Gnome": "Gnomes, or the Forgotten Folk as they were sometimes known, were small "
+                              "humanoids known for their eccentric sense of humor, inquisitiveness, and "
+                              "engineering prowess. Having had few overt influences on the world's history "
+                              "but many small and unseen ones, gnomes were often overlooked by the powers "
+                              "that be, despite their craftiness and affinity for illusion magic. Gnomes "
+                              "were present in nearly every human city and most caravan-stop villages "
+                              "where other cultures and non-human races were at least tolerated."
+                              "In game terms- this character will increase your intelligence stat by +2.",
+
+                     "Half-orc": "Half-orcs were humanoids born of both human and orc ancestry by a "
+                                 "multitude of means. Having the combined physical power of their orcish "
+                                 "ancestors with the agility of their human ones, half-orcs were "
+                                 "formidable individuals. Though they were often shunned in both human "
+                                 "and orcish society for different reasons, half-orcs have proven "
+                                 "themselves from time to time as worthy heroes and dangerous villains. "
+                                 "Their existence implied an interesting back story that most would not "
+                                 "like to dwell on. In game terms, your strength stat gets +2, whilst your "
+                                 "constitution stat gets a +1 bonus.",
+
+                     "Half-elf": "Half-elves (also called Cha'Tel'Quessir in elven) were humanoids born "
+                                 "through the union of an elf and a human. Whether a half-elf was raised "
+                                 "by their human parent or their elven parent, they often felt isolated "
+                                 "and alone. Because they took around twenty years to reach adulthood, "
+                                 "they matured quickly when raised by elves, making them feel like an "
+                                 "outsider in either place. Like their elven parents, half-elves were "
+                                 "immune to the effects of the enchantment of magic, whilst also "
+                                 "inheriting the ability to see keenly in low-light conditions, with "
+                                 "little or no ill effect, and had enhanced senses of sight and hearing "
+                                 "compared to their human brethren. In game terms- they receive +2 in "
+                                 "Charisma, and +1 to any other ability scores."
+}
+
+# each character owns a fixed block of counters, so character k's draws are known without making the ones before it.
+DRAWS_PER_CHARACTER = 32
+DICE_DRAWS = range(24)  # 6 abilities x 4 dice
+RACE_DRAW = 24
+CLASS_DRAW = 25
+# counters are 64 bits, so past this the blocks would wrap around onto the first characters' draws.
+MAX_CHARACTER = (1 << 64) // DRAWS_PER_CHARACTER - 1
+
+
+def check_characters(start: int, count: int) -> None:
+    """
+    Makes sure every character from start has its own block of counters.
+    :param int start: The id of the first character.
+    :param int count: The number of characters.
+    :return: None
+    """
+    if start < 0 or start + count - 1 > MAX_CHARACTER:
+        raise ValueError(f"character ids go from 0 to {MAX_CHARACTER}, not {start} to {start + count - 1}")
+
+
+class CounterRNG:
+    GOLDEN = 0x9E3779B97F4A7C15
+
+    def __init__(self, seed: int = 0):
+        """
+        A stateless random source: the value at any counter is a hash of (seed, counter), so any position can be jumped
+        to directly. It's SplitMix64, with the counter standing in for the number of steps taken.
+        :param int seed: The seed.
+        """
+        import numpy
+
+        self.seed = seed
+        self.key = self.mix(numpy.array([seed & 0xFFFFFFFFFFFFFFFF], dtype=numpy.uint64))[0]
+
+    @staticmethod
+    def mix(z: numpy.ndarray) -> numpy.ndarray:
+        """
+        SplitMix64's output function, spreads every input bit over the whole 64 bits.
+        :param numpy.ndarray z: uint64 values.
+        :return: numpy.ndarray
+        """
+        import numpy
+
+        z = (z ^ (z >> numpy.uint64(30))) * numpy.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> numpy.uint64(27))) * numpy.uint64(0x94D049BB133111EB)
+        return z ^ (z >> numpy.uint64(31))
+
+    def random_bits(self, counters: numpy.ndarray) -> numpy.ndarray:
+        """
+        64 random bits per counter.
+        :param numpy.ndarray counters: uint64 counters.
+        :return: numpy.ndarray
+        """
+        import numpy
+
+        return self.mix(self.key + (counters + numpy.uint64(1)) * numpy.uint64(self.GOLDEN))
+
+    def integers(self, high: int, characters: numpy.ndarray, draws: numpy.ndarray) -> numpy.ndarray:
+        """
+        Numbers from 0 to high - 1 for each draw slot of each character.
+        :param int high: One past the highest number.
+        :param numpy.ndarray characters: The characters' indices.
+        :param numpy.ndarray draws: Which of each character's DRAWS_PER_CHARACTER slots to use.
+        :return: A (len(characters), len(draws)) array.
+        """
+        import numpy
+
+        counters = characters.astype(numpy.uint64)[:, None] * numpy.uint64(DRAWS_PER_CHARACTER) + \
+            numpy.asarray(draws, dtype=numpy.uint64)[None, :]
+        # scale the top 32 bits onto the range rather than using %, the bias is at most high / 2 ** 32.
+        return ((self.random_bits(counters) >> numpy.uint64(32)) * numpy.uint64(high)) >> numpy.uint64(32)
+
+
+class StatsGenerator:
+    # the order abilities are rolled in, shared by roll() and the columns of roll_batch().
+    ABILITIES = ("Strength", "Dexterity", "Charisma", "Constitution", "Intelligence", "Wisdom")
+
+    def __init__(self, image_name: str = "", stats=None, seed: Optional[int] = None):
+        self.stats = stats
+        if self.stats is None:
+            self.stats = {}
+        self.race_name = image_name
+        # with a seed, rolls come from a CounterRNG and character k can be rolled again at any time.
+        self.rng = None if seed is None else CounterRNG(seed)
+        self.counter = 0  # the character the next seeded roll will be
+
+    def roll(self, index: Optional[int] = None) -> dict:
+        """
+        Rolls 4D6 and records the three highest scores per ability.
+        :param int index: With a seed, which character to roll, the next one if not given.
+        :return: The dictionary of the stats.
+        """
+        if self.rng is not None:
+            ability_score = self.roll_batch(1, start=index)[0].tolist()
+            for ability, score in zip(self.ABILITIES, ability_score):
+                self.stats[ability] = score
+            return self.stats
+
+        ability_score = []
+        scores_temp = []
+        for ability in range(6):  # loop around 6 times/ number of abilities there are.
+            for i in range(4):  # loop around the number of dice per ability (4).
+                scores_temp.append(randrange(1, 7))  # add it to the end of the temporary list
+            scores_temp.sort()  # sort list, so highest items
+            ability_score.append(scores_temp[-1] + scores_temp[-2] + scores_temp[-3])
+            scores_temp.clear()
+
+        for ability, score in zip(self.ABILITIES, ability_score):
+            self.stats[ability] = score
+
+        return self.stats
+
+    def roll_batch(self, n: int, rng: Optional[numpy.random.Generator] = None, start: Optional[int] = None) \
+            -> numpy.ndarray:
+        """
+        Rolls 4D6 and records the three highest scores per ability, for n characters at once.
+        :param int n: The number of characters to roll for.
+        :param numpy.random.Generator rng: The generator to draw dice from. If not given, the seed's CounterRNG is used,
+        or a fresh generator if there's no seed.
+        :param int start: With a seed, the index of the first character, carrying on from the last roll if not given.
+        :return: An (n, 6) array of ability scores, columns in the same order as ABILITIES.
+        """
+        import numpy
+
+        if rng is None and self.rng is not None:
+            if start is None:
+                start = self.counter
+                self.counter += n
+            check_characters(start, n)
+            characters = numpy.arange(start, start + n, dtype=numpy.uint64)
+            dice = (self.rng.integers(6, characters, DICE_DRAWS) + 1).astype(numpy.uint8)
+            dice = dice.reshape(n, len(self.ABILITIES), 4)
+        else:
+            if rng is None:
+                rng = numpy.random.default_rng()
+            dice = rng.integers(1, 7, size=(n, len(self.ABILITIES), 4), dtype=numpy.uint8)
+
+        # dropping the lowest die is the same as taking it away from the total, so no sorting is needed.
+        return dice.sum(axis=2, dtype=numpy.uint8) - dice.min(axis=2)
+
+    def set_name(self, name) -> None:
+        """
+        Sets name of users chosen race.
+        :return: None
+        """
+        self.race_name = name
+
+    def modifier(self, category: str, amount: int) -> dict:
+        """
+        Modifies the stats of the character chosen.
+        :param str category: The stat category we are manipulating, ie Strength, dex, etc.
+        :param int amount: The amount we are increasing that stat category by.
+        :return: The new dict.
+        """
+        self.stats[category] += amount
+        return self.stats
+
+
+class Character:
+    __slots__ = ("race", "dnd_class", "stats")
+
+    def __init__(self, race: int, dnd_class: int, stats: bytes):
+        """
+        One character, kept small: the race and class as codes, and the scores as one byte each.
+        :param int race: Index into RACES.
+        :param int dnd_class: Index into CLASSES.
+        :param bytes stats: The scores, in StatsGenerator.ABILITIES order.
+        """
+        self.race = race
+        self.dnd_class = dnd_class
+        self.stats = stats
+
+    @classmethod
+    def from_names(cls, race: str, dnd_class: str, stats: Dict[str, int]) -> Character:
+        """
+        Makes a character from the names Main keeps, ie dnd_race, dnd_class and user_stats.
+        :param str race: The race's name, ie "Elf".
+        :param str dnd_class: The class's name, ie "Wizard".
+        :param Dict[str, int] stats: ability -> score, for every ability.
+        :return: Character
+        """
+        return cls(RACES.index(race), CLASSES.index(dnd_class),
+                   bytes(stats[ability] for ability in StatsGenerator.ABILITIES))
+
+    def get_race(self) -> str:
+        """
+        Gets the name of the race.
+        :return: str
+        """
+        return RACES[self.race]
+
+    def get_class(self) -> str:
+        """
+        Gets the name of the class.
+        :return: str
+        """
+        return CLASSES[self.dnd_class]
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Gets the scores by ability.
+        :return: ability -> score
+        """
+        return dict(zip(StatsGenerator.ABILITIES, self.stats))
+
+    def __repr__(self) -> str:
+        return f"Character({self.get_race()!r}, {self.get_class()!r}, {self.get_stats()})"
+
+
+class CharacterBatch(NamedTuple):
+    start: int  # id of the first character in the batch
+    races: numpy.ndarray  # (count,) uint8 index into RACES per character
+    classes: numpy.ndarray  # (count,) uint8 index into CLASSES per character
+    stats: numpy.ndarray  # (count, 6) uint8 scores, columns in StatsGenerator.ABILITIES order
+
+    @classmethod
+    def from_characters(cls, characters: Sequence[Character], start: int = 0) -> CharacterBatch:
+        """
+        Packs characters into columns.
+        :param Sequence[Character] characters: The characters.
+        :param int start: The id of the first one.
+        :return: CharacterBatch
+        """
+        import numpy
+
+        races = numpy.fromiter((character.race for character in characters), numpy.uint8, len(characters))
+        classes = numpy.fromiter((character.dnd_class for character in characters), numpy.uint8, len(characters))
+        stats = numpy.frombuffer(b"".join(character.stats for character in characters), numpy.uint8)
+        return cls(start, races, classes, stats.reshape(len(characters), len(StatsGenerator.ABILITIES)))
+
+    def character(self, offset: int) -> Character:
+        """
+        Gets one character of the batch.
+        :param int offset: Its position in the batch, not its id.
+        :return: Character
+        """
+        return Character(int(self.races[offset]), int(self.classes[offset]), self.stats[offset].tobytes())
@@ -0,0 +1,90 @@
+from pygame.locals import *
+from time import perf_counter
+from typing import *
+import pygame
+
+
+def ticks() -> int:
+    """
+    Milliseconds from a fixed point, for timing events. pygame.time.get_ticks needs the timer subsystem, which isn't
+    started until the frame clock first ticks.
+    :return: int
+    """
+    return int(perf_counter() * 1000)
+
+
+def coalesce(events: List[pygame.event.Event]) -> List[pygame.event.Event]:
+    """
+    Drops mouse movements that are followed by another movement before any click, as only the last position matters.
+    :param List[pygame.event.Event] events: The events, in the order they arrived.
+    :return: The events left, still in order.
+    """
+    kept = []
+    superseded = False  # whether a later movement makes a movement pointless
+    for event in reversed(events):
+        if event.type == MOUSEMOTION:
+            if superseded:
+                continue
+            superseded = True
+        elif event.type in (MOUSEBUTTONDOWN, MOUSEBUTTONUP):
+            superseded = False
+        kept.append(event)
+    kept.reverse()
+    return kept
+
+
+class LatencyHistogram:
+    EDGES = (1, 2, 4, 8, 16, 33, 66, 133, 266)  # upper bounds of each bucket in milliseconds, the last is open ended
+
+    def __init__(self):
+        """
+        Counts how long events wait between arriving and being handled, in buckets of milliseconds that roughly double
+        in width, see EDGES. The edges from 16 up are about 1, 2, 4, 8 and 16 frames at 60 FPS.
+        """
+        self.counts = [0] * (len(self.EDGES) + 1)
+        self.total = 0
+        self.worst = 0
+
+    def add(self, latency: int) -> None:
+        """
+        Records one event.
+        :param int latency: Milliseconds between the event arriving and it being handled.
+        :return: None
+        """
+        for bucket, edge in enumerate(self.EDGES):
+            if latency < edge:
+                break
+        else:
+            bucket = len(self.EDGES)
+        self.counts[bucket] += 1
+        self.total += 1
+        self.worst = max(self.worst, latency)
+
+    def percentile(self, percent: float) -> int:
+        """
+        The upper bound of the bucket the percentile falls in.
+        :param float percent: From 0 to 100.
+        :return: Milliseconds, or -1 if nothing has been recorded.
+        """
+        if not self.total:
+            return -1
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= self.total * percent / 100:
+                return self.EDGES[bucket] if bucket < len(self.EDGES) else self.worst
+        return self.worst
+
+    def report(self) -> str:
+        """
+        One line per bucket, then the worst latency seen.
+        :return: str
+        """
+        lines = []
+        low = 0
+        for edge, count in zip(self.EDGES + (None,), self.counts):
+            label = f"{low}-{edge - 1} ms" if edge is not None else f">= {low} ms"
+            lines.append(f"{label:>12}: {count}")
+            low = edge
+        lines.append(f"{'worst':>12}: {self.worst} ms of {self.total} events")
+        return "\n".join(lines)
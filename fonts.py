@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import *
+import pygame
+
+FONT = "Calibri"
+
+
+@lru_cache(maxsize=None)
+def get_font(size: int, name: str = FONT) -> pygame.font.Font:
+    """
+    Gets a system font. pygame.font.SysFont searches every installed font each time it's called, so each (name, size)
+    is only looked up once.
+    :param int size: The size of the font.
+    :param str name: The name of the font.
+    :return: pygame.font.Font
+    """
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return pygame.font.SysFont(name, size)
+
+
+@lru_cache(maxsize=None)
+def fit_size(text: str, width: int, height: int, name: str = FONT, largest: int = 72) -> int:
+    """
+    Finds the biggest font size text can be drawn at without going past width or height. Text only gets bigger as the
+    size does, so the sizes are binary searched, and each answer is kept so it's only searched for once.
+    :param str text: The text, on one line.
+    :param int width: The most pixels wide it can be.
+    :param int height: The most pixels high it can be.
+    :param str name: The name of the font.
+    :param int largest: The biggest size to consider.
+    :return: The size, 1 if even that doesn't fit.
+    """
+    low, high = 1, largest
+    while low < high:
+        middle = (low + high + 1) // 2
+        text_width, text_height = get_font(middle, name).size(text)
+        if text_width <= width and text_height <= height:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def wrap(text: str, limit: int) -> List[str]:
+    """
+    Splits text into lines of fewer than limit characters, breaking between words.
+    :param str text: The message to split.
+    :param int limit: Line limit before we move to a new line.
+    :return: The lines, each word followed by a space.
+    """
+    split_text = text.split(" ")  # splits text
+    if len(split_text) == 1:
+        return [text]
+
+    lines = []
+    temp_text = ""  # temporary string
+    for word in split_text:  # for each word in the split text variable.
+        if len(word) + len(temp_text) < limit:  # if length of word and length of temporary string has not
+            # reached the limit
+            temp_text += f"{word} "  # add the word on the temporary string.
+        else:
+            lines.append(temp_text)
+            temp_text = f"{word} "  # any word carried over is the start of the new temporary string.
+
+    # in case loop stopped and there was some left over text, keep it.
+    lines.append(temp_text)
+    return lines
+
+
+class TextCache:
+    def __init__(self, budget: int = 4 * 1024 * 1024):
+        """
+        Keeps rendered text, so text that's already been shown can be blitted again without rendering it. The least
+        recently used text is dropped once the surfaces take up more than the budget.
+        :param int budget: The most bytes of surfaces to keep.
+        """
+        self.budget = budget
+        self.size = 0  # bytes of surfaces currently kept
+        self.surfaces = OrderedDict()  # (text, font size, colour, limit, font name) -> one surface per line
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cost(surfaces: List[pygame.Surface]) -> int:
+        """
+        The bytes taken by a list of surfaces.
+        :param List[pygame.Surface] surfaces: The surfaces.
+        :return: int
+        """
+        return sum(surface.get_width() * surface.get_height() * surface.get_bytesize() for surface in surfaces)
+
+    def render(self, text: str, font_size: int, rgb: Tuple[int, int, int], limit: int, name: str = FONT) \
+            -> List[pygame.Surface]:
+        """
+        Gets text wrapped and rendered, one surface per line, rendering it only if it isn't kept already.
+        :param str text: The message.
+        :param int font_size: The size of the font.
+        :param Tuple[int, int, int] rgb: The colour of the text.
+        :param int limit: Line limit before we move to a new line.
+        :param str name: The name of the font.
+        :return: List[pygame.Surface]
+        """
+        key = (text, font_size, tuple(rgb), limit, name)
+        if key in self.surfaces:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return self.surfaces[key]
+
+        self.misses += 1
+        font = get_font(font_size, name)
+        surfaces = [font.render(line, False, rgb) for line in wrap(text, limit)]
+        self.surfaces[key] = surfaces
+        self.size += self.cost(surfaces)
+
+        while self.size > self.budget and len(self.surfaces) > 1:
+            self.size -= self.cost(self.surfaces.popitem(last=False)[1])
+        return surfaces
+
+
+text_cache = TextCache()
@@ -0,0 +1,230 @@
+"""
+Generates characters in bulk without opening a window.
+Usage: python generate.py 1000000 --seed 42 --workers 8 --format csv --output characters.csv
+With --format store, the characters are written to a memory mapped file with indexes instead, see store.py.
+With --format stats, only statistics of the population are kept, see population.py.
+Character k of a seed is the same however the run is split, see character() to regenerate one on its own.
+"""
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import *
+import json
+import sys
+
+import numpy
+
+from character import CLASS_DRAW, CLASSES, RACE_DRAW, RACES, CharacterBatch, MAX_CHARACTER, StatsGenerator, \
+    check_characters
+from rules import apply_racial_bonuses, assign_scores, compile_classes
+from population import PopulationStats, aggregate
+from store import write_store
+
+CHUNK_SIZE = 10_000
+
+
+def generate_chunk(seed: int, start: int, count: int, racial_bonuses: bool = False, auto_assign: bool = False) \
+        -> CharacterBatch:
+    """
+    Rolls one chunk of characters. Every draw comes from the seed's CounterRNG at a position fixed by the character's
+    id, so a chunk is the same whichever process rolls it, and however the run was split up.
+    :param int seed: The seed of the whole run.
+    :param int start: The id of the first character.
+    :param int count: How many characters to roll.
+    :param bool racial_bonuses: Whether to add each race's ability increases to the scores.
+    :param bool auto_assign: Whether to rearrange each character's scores to suit their class.
+    :return: CharacterBatch
+    """
+    check_characters(start, count)
+    generator = StatsGenerator(seed=seed)
+    characters = numpy.arange(start, start + count, dtype=numpy.uint64)
+    races = generator.rng.integers(len(RACES), characters, [RACE_DRAW])[:, 0].astype(numpy.uint8)
+    classes = generator.rng.integers(len(CLASSES), characters, [CLASS_DRAW])[:, 0].astype(numpy.uint8)
+    stats = generator.roll_batch(count, start=start)
+    preference = None
+    if auto_assign:
+        stats = assign_scores(stats, races, classes)
+        preference = compile_classes().weights[classes]  # the increases of choice assign_scores() counted on
+    if racial_bonuses:
+        stats = apply_racial_bonuses(stats, races, preference)
+    return CharacterBatch(start, races, classes, stats)
+
+
+def character(seed: int, index: int, racial_bonuses: bool = False, auto_assign: bool = False) -> dict:
+    """
+    Regenerates a single character of a run, without generating the ones before it.
+    :param int seed: The seed of the run.
+    :param int index: The character's id.
+    :param bool racial_bonuses: Whether the run added racial ability increases.
+    :param bool auto_assign: Whether the run rearranged scores to suit each class.
+    :return: dict
+    """
+    return next(records(generate_chunk(seed, index, 1, racial_bonuses, auto_assign)))
+
+
+def records(chunk: CharacterBatch) -> Iterator[dict]:
+    """
+    Turns a chunk into one dict per character.
+    :param CharacterBatch chunk: The generated characters.
+    :return: Iterator[dict]
+    """
+    for offset, (race, dnd_class, stats) in enumerate(zip(chunk.races, chunk.classes, chunk.stats.tolist())):
+        record = {"id": chunk.start + offset, "race": RACES[race], "class": CLASSES[dnd_class]}
+        record.update(zip(StatsGenerator.ABILITIES, stats))
+        yield record
+
+
+def format_jsonl(chunk: CharacterBatch) -> str:
+    """
+    One JSON object per line.
+    :param CharacterBatch chunk: The generated characters.
+    :return: str
+    """
+    return "".join(json.dumps(record) + "\n" for record in records(chunk))
+
+
+def format_csv(chunk: CharacterBatch) -> str:
+    """
+    One comma separated line per character, in the same order as CSV_HEADER.
+    :param CharacterBatch chunk: The generated characters.
+    :return: str
+    """
+    return "".join(",".join(str(value) for value in record.values()) + "\n" for record in records(chunk))
+
+
+CSV_HEADER = ",".join(["id", "race", "class", *StatsGenerator.ABILITIES]) + "\n"
+# header, then how to write each chunk. the store format keeps chunks as they are, for write_store(). the stats format
+# has no per chunk step: render_chunk() folds a whole shard of chunks into statistics in the worker.
+FORMATS = {"jsonl": ("", format_jsonl), "csv": (CSV_HEADER, format_csv), "store": ("", lambda chunk: chunk),
+           "stats": ("", None)}
+
+
+def render_chunk(fmt: str, *job, chunk_size: int = CHUNK_SIZE) \
+        -> Tuple[int, Union[str, CharacterBatch, PopulationStats]]:
+    """
+    Generates a chunk and formats it, so both happen in the worker process. For the stats format the job is a whole
+    shard, rolled chunk_size characters at a time and folded into one set of statistics, as a set is far bigger than
+    the characters of one chunk.
+    :param str fmt: A key of FORMATS.
+    :param job: The arguments for generate_chunk.
+    :param int chunk_size: The number of characters rolled at once, for the stats format.
+    :return: The number of characters, and their text, or what the store and stats formats keep.
+    """
+    if fmt == "stats":
+        seed, start, count, *flags = job
+        return count, aggregate(generate_chunk(seed, i, min(chunk_size, start + count - i), *flags)
+                                for i in range(start, start + count, chunk_size))
+    chunk = generate_chunk(*job)
+    return len(chunk.stats), FORMATS[fmt][1](chunk)
+
+
+def pipeline(n: int, seed: int, workers: int, fmt: str = "jsonl", chunk_size: int = CHUNK_SIZE, first: int = 0,
+             racial_bonuses: bool = False, auto_assign: bool = False) \
+        -> Iterator[Tuple[int, Union[str, CharacterBatch, PopulationStats]]]:
+    """
+    Yields the formatted characters in id order, a chunk at a time, or a shard per worker for stats. Only a couple of
+    chunks per worker are in flight at once, so memory stays the same however many characters are asked for.
+    :param int n: The number of characters.
+    :param int seed: The seed of the run.
+    :param int workers: The number of processes to use, 1 to generate in this process.
+    :param str fmt: A key of FORMATS.
+    :param int chunk_size: The number of characters per chunk.
+    :param int first: The id of the first character, so a run can be split into shards.
+    :param bool racial_bonuses: Whether to add each race's ability increases to the scores.
+    :param bool auto_assign: Whether to rearrange each character's scores to suit their class.
+    :return: The number of characters in each chunk, and their text, or what the store and stats formats keep.
+    """
+    job_size = chunk_size
+    if fmt == "stats":
+        # one shard per worker, each a whole number of chunks.
+        job_size = max(1, -(-n // (workers * chunk_size))) * chunk_size
+    jobs = ((fmt, seed, i, min(job_size, first + n - i), racial_bonuses, auto_assign)
+            for i in range(first, first + n, job_size))
+
+    if workers == 1:
+        for job in jobs:
+            yield render_chunk(*job, chunk_size=chunk_size)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(render_chunk, *job, chunk_size=chunk_size))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write(stream: Iterable[Tuple[int, str]], out: TextIO, header: str = "") -> int:
+    """
+    Writes the formatted chunks as they arrive.
+    :param Iterable[Tuple[int, str]] stream: The output of pipeline().
+    :param TextIO out: Where to write them.
+    :param str header: Written once before the first chunk.
+    :return: The number of characters written.
+    """
+    out.write(header)
+    written = 0
+    for count, text in stream:
+        out.write(text)
+        written += count
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = ArgumentParser(description="Generate D&D characters in bulk.")
+    parser.add_argument("count", type=int, help="how many characters to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="processes to spread the work over")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--first", type=int, default=0, help="id of the first character, to generate one shard of a run")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--racial-bonuses", action="store_true", help="add each race's ability increases")
+    parser.add_argument("--auto-assign", action="store_true",
+                        help="rearrange each character's scores to suit their class")
+    parser.add_argument("--output", help="file to write to, stdout if not given")
+    args = parser.parse_args(argv)
+    if args.count < 0:
+        parser.error("count can't be negative")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.first < 0:
+        parser.error("--first can't be negative")
+    if args.first + args.count - 1 > MAX_CHARACTER:
+        parser.error(f"character ids only go up to {MAX_CHARACTER}")
+    if args.format == "store" and not args.output:
+        parser.error("--format store needs --output")
+
+    start = perf_counter()
+    stream = pipeline(args.count, args.seed, args.workers, args.format, args.chunk_size, args.first,
+                      args.racial_bonuses, args.auto_assign)
+    if args.format == "store":
+        written = write_store(args.output, (chunk for count, chunk in stream), args.count, args.first)
+    elif args.format == "stats":
+        written, population = 0, PopulationStats()
+        for count, shard in stream:
+            population.merge(shard)
+            written += count
+        if args.output:
+            population.save(args.output)
+        else:
+            print(population.report("race"))
+    else:
+        out = open(args.output, "w", newline="") if args.output else sys.stdout
+        try:
+            written = write(stream, out, FORMATS[args.format][0])
+        finally:
+            if args.output:
+                out.close()
+    elapsed = perf_counter() - start
+
+    print(f"{written} characters in {elapsed:.2f}s ({written / elapsed:,.0f} characters/sec, "
+          f"{args.workers} worker(s))", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
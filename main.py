@@ -1,21 +1,78 @@
-from random import randrange
+from argparse import ArgumentParser
+from functools import lru_cache
 from pygame.locals import *
 from typing import *
+from time import perf_counter, process_time
 import pygame
 
-pygame.init()
+from assets import assets
+from character import CLASSES, RACE_DESCRIPTIONS, RACES, StatsGenerator
+from events import LatencyHistogram, coalesce, ticks
+from fonts import fit_size, get_font, text_cache
+from profiler import PHASES, profiler
+from renderer import renderer
+from rules import apply_racial_bonuses, assign_scores, compile_classes
 
-WIDTH = 600
+WIDTH = 600  # the layout's size, in layout units: the window is this times SCALE in pixels
 HEIGHT = 750
+SCALE = 1.0  # window pixels per layout unit, see configure()
 FPS_Clock = pygame.time.Clock()
 FPS = 60
+IDLE_TIMEOUT = 500  # the longest an idle screen sleeps between frames, in milliseconds
+ACTIVE_TIME = 250  # how long after an event the loop keeps running at FPS, so hovering stays smooth, in milliseconds
+# ability -> where its box goes, in layout units like every position below.
+BOXES = {"Wisdom": (25, 50), "Strength": (25, HEIGHT // 2 + 65), "Intelligence": (225, 50),
+         "Dexterity": (225, HEIGHT // 2 + 65), "Constitution": (425, 50), "Charisma": (425, HEIGHT // 2 + 65)}
+AUTO_ASSIGN = Rect(WIDTH // 2 - 60, HEIGHT // 2 + 20, 120, 30)  # the auto-assign button, below the roll button
+
+
+def configure(scale: float) -> None:
+    """
+    Sets the size everything is drawn at, ie 2 for a 1200x1500 window. Has to be called before Main() is made, as
+    images are scaled once, when they're first loaded.
+    :param float scale: Window pixels per layout unit.
+    :return: None
+    """
+    global SCALE
+    SCALE = scale
+    assets.set_scale(scale)
+
+
+def scaled(value: float) -> int:
+    """
+    Converts a length or position in layout units to window pixels.
+    :param float value: The length in layout units.
+    :return: int
+    """
+    return round(value * SCALE)
+
+
+def scaled_point(point: Tuple[int, int]) -> Tuple[int, int]:
+    """
+    Converts a position in layout units to window pixels.
+    :param Tuple[int, int] point: The x and y in layout units.
+    :return: Tuple[int, int]
+    """
+    return scaled(point[0]), scaled(point[1])
+
+
+def scaled_rect(rect) -> Rect:
+    """
+    Converts a rect in layout units to window pixels. Its edges are scaled rather than its size, so rects that touch
+    still touch once scaled.
+    :param rect: A Rect or (x, y, width, height) in layout units.
+    :return: Rect
+    """
+    rect = Rect(rect)
+    left, top = scaled(rect.left), scaled(rect.top)
+    return Rect(left, top, scaled(rect.right) - left, scaled(rect.bottom) - top)
 
 
 class Sprite:
     def __init__(self, surface, image: str):
         self.surface = surface
         self.name = image
-        self.image = pygame.image.load(f"Graphics/{image}.png").convert_alpha(self.surface)
+        self.image = assets.get(image)  # shared with every other sprite of the same image, so never drawn onto
         self.rect = self.image.get_rect()
 
     def draw(self, coord: Tuple[int, int], set_rect: bool = True) -> None:
@@ -25,10 +82,10 @@ class Sprite:
         :param bool set_rect: Checks whether we want to set the rect of an image.
         :return: None
         """
-        self.surface.blit(self.image, [coord[0], coord[1]])
+        renderer.blit(self.surface, self.image, [coord[0], coord[1]])
         if set_rect:
             self.set_rect(coord)
-        pygame.display.update(Rect(coord[0], coord[1], self.image.get_width(), self.image.get_height()))
+        renderer.mark((coord[0], coord[1], self.image.get_width(), self.image.get_height()))
 
     def get_rect(self):
         """
@@ -65,6 +122,32 @@ class Select(Sprite):
         super().__init__(surface, image)
         self.mouse_pos = mouse_pos
         self.selectable = False
+        # (hover colour, original colour) -> ((normal image, hit mask), (highlighted image, hit mask))
+        self.variants = {}
+
+    def bake(self, rgb: Tuple[int, int, int], replacement_colour: Tuple[int, int, int]) \
+            -> Tuple[Tuple[pygame.Surface, pygame.mask.Mask], Tuple[pygame.Surface, pygame.mask.Mask]]:
+        """
+        Makes the normal and highlighted images for a pair of border colours, with a mask of where each can be
+        clicked. Only done the first time a pair is asked for.
+        :param Tuple[int, int, int] rgb: The colour to replace the original colour.
+        :param Tuple[int, int, int] replacement_colour: The original colour.
+        :return: (normal image, hit mask), (highlighted image, hit mask)
+        """
+        key = (tuple(rgb), tuple(replacement_colour))
+        if key not in self.variants:
+            self.variants[key] = (self.recolour(rgb, replacement_colour), self.recolour(replacement_colour, rgb))
+        return self.variants[key]
+
+    def recolour(self, old: Tuple[int, int, int], new: Tuple[int, int, int]) \
+            -> Tuple[pygame.Surface, pygame.mask.Mask]:
+        """
+        The image with one colour swapped for another, made by the asset manager before the image is scaled.
+        :param Tuple[int, int, int] old: The colour to swap out.
+        :param Tuple[int, int, int] new: The colour to put in its place.
+        :return: The new image, and a mask of its pixels that aren't black (the border), which are the clickable ones.
+        """
+        return assets.variant(self.name, old, new)
 
     def hover(self, rgb: Tuple[int, int, int], replacement_colour: Tuple[int, int, int], set_rect: bool = True) -> None:
         """
@@ -75,19 +158,29 @@ class Select(Sprite):
         :param bool set_rect: Whether we want to set the new rect of the image or not.
         :return: None
         """
-        px_array = pygame.PixelArray(self.image)
-        if self.get_rect().collidepoint(self.mouse_pos) and self.surface.get_at((self.mouse_pos[0], self.mouse_pos[1]))\
-                != (0, 0, 0) and pygame.mouse.get_focused() != 0:
+        normal, highlighted = self.bake(rgb, replacement_colour)
+        mask = highlighted[1] if self.selectable else normal[1]  # the mask of what's on the screen right now
+        rect = self.get_rect()
+        offset = (self.mouse_pos[0] - rect[0], self.mouse_pos[1] - rect[1])  # mouse position within the image
+        if rect.collidepoint(self.mouse_pos) and mask.get_at(offset) and pygame.mouse.get_focused() != 0:
             # if mouse pos is over an image, and where the mouse is over is not black (the border) and the mouse is on
             # the screen
-            px_array.replace(replacement_colour, rgb)
+            self.image = highlighted[0]
             self.selectable = True
         else:
-            px_array.replace(rgb, replacement_colour)
+            self.image = normal[0]
             self.selectable = False
 
-        px_array.close()  # close the px_array
-        self.draw((self.get_rect()[0], self.get_rect()[1]), set_rect)  # draw new results onto the screen
+        self.draw((rect[0], rect[1]), set_rect)  # draw new results onto the screen
+
+    def unhighlight(self, rgb: Tuple[int, int, int], replacement_colour: Tuple[int, int, int]) -> None:
+        """
+        Puts the original border colour back, without drawing.
+        :param Tuple[int, int, int] rgb: The colour that replaces the original colour on hover.
+        :param Tuple[int, int, int] replacement_colour: The original colour.
+        :return: None
+        """
+        self.image = self.bake(rgb, replacement_colour)[0][0]
 
     def is_selectable(self) -> bool:
         """
@@ -105,30 +198,69 @@ class Select(Sprite):
         self.selectable = select
 
 
+@lru_cache(maxsize=None)
+def make_tile(value: int) -> pygame.Surface:
+    """
+    Makes the tile a score is shown on, which is what gets dragged between boxes. Each score's tile is only made once.
+    :param int value: The score.
+    :return: pygame.Surface
+    """
+    tile = pygame.Surface(scaled_rect(Box.TILE).size).convert()
+    tile.fill((255, 255, 255))
+    pygame.draw.rect(tile, (160, 160, 160), tile.get_rect(), max(1, scaled(1)))
+    text = get_font(scaled(60)).render(str(value), False, (0, 0, 0))
+    tile.blit(text, text.get_rect(center=tile.get_rect().center))
+    return tile
+
+
 class Box(Sprite):
+    # where things go inside the box image, in layout units: the strip the title is fitted into, the space under it,
+    # and the score tile.
+    TITLE = Rect(11, 10, 127, 24)
+    BODY = Rect(11, 44, 128, 145)
+    TILE = Rect(35, 84, 80, 64)
+
     def __init__(self, surface, image: str, category: str, value: int = 0):
         super().__init__(surface, image)
         self.category = category
         self.value = value
-        self.found_font_size = False
-        self.prev_font_size = (0, 0)
-        self.font = 1
 
-    def title(self, font_size: int, width: int = 127, height: int = 24) -> int:
+    def title(self) -> int:
         """
-        Finds length of category, and depending on that length find a suitable font size, and display on box.
-        :param int width: The amount of pixels wide the text has to be before it's acceptable.
-        :param int height: The amount of pixels high the text has to be before it's acceptable.
-        :param int font_size: Our initial font size
-        :return: int, 1 to increase font size, -1 to decrease, 0 if it's an acceptable font size.
+        Draws the category, as big as fits in the title strip, centred in it.
+        :return: int, the font size used.
         """
-        # need a way to tell whether font needs to increase or not: perhaps using 1 for increase, -1 for decrease, 0
-        # otherwise.
-        self.font = pygame.font.SysFont("Calibri", font_size)
-        size = self.font.size(self.category)
-
+        strip = scaled_rect(self.TITLE).move(self.rect.topleft)
+        # searched for once per category and size, then remembered.
+        font_size = fit_size(self.category, strip.width, strip.height)
+        text = text_cache.render(self.category, font_size, (0, 0, 0), len(self.category) + 1)[0]
+        renderer.blit(self.surface, text, text.get_rect(center=strip.center))
+        renderer.mark(strip)
+        return font_size
 
+    def tile_rect(self) -> Rect:
+        """
+        Where the score's tile is on the screen.
+        :return: Rect
+        """
+        return scaled_rect(self.TILE).move(self.rect.topleft)
 
+    def show_value(self, increase: int = 0, tile: bool = True) -> None:
+        """
+        Redraws the space under the title: the score's tile, and the racial increase under it.
+        :param int increase: The racial increase, not shown if 0.
+        :param bool tile: False to leave the tile out, ie while it's being dragged.
+        :return: None
+        """
+        body = scaled_rect(self.BODY).move(self.rect.topleft)
+        self.surface.fill((255, 255, 255), body)
+        if tile:
+            renderer.blit(self.surface, make_tile(self.value), self.tile_rect())
+        if increase:
+            text = text_cache.render(f"+{increase}", scaled(25), (0, 128, 0), 4)[0]
+            midtop = (body.centerx, self.tile_rect().bottom + scaled(8))
+            renderer.blit(self.surface, text, text.get_rect(midtop=midtop))
+        renderer.mark(body)
 
     def get_value(self) -> int:
         """
@@ -138,155 +270,125 @@ class Box(Sprite):
         return self.value
 
 
-class StatsGenerator:
-    def __init__(self, image_name: str = "", stats=None):
-        self.stats = stats
-        if self.stats is None:
-            self.stats = {}
-        self.race_name = image_name
-
-    def roll(self) -> dict:
+class Drag:
+    def __init__(self, surface: pygame.Surface, tile: pygame.Surface, rect: Rect, pos: Tuple[int, int], origin: str):
         """
-        Rolls 4D6 and records the three highest scores per ability.
-        :return: The dictionary of the stats.
+        A tile following the mouse. What's under the tile is kept, so moving it only restores the old rect and draws
+        the new one, rather than redrawing the screen.
+        :param pygame.Surface surface: The screen, already drawn without the tile.
+        :param pygame.Surface tile: The tile.
+        :param Rect rect: Where the tile starts.
+        :param Tuple[int, int] pos: Where the mouse picked it up.
+        :param str origin: The ability of the box it came from.
         """
-        ability_score = []
-        scores_temp = []
-        for ability in range(6):  # loop around 6 times/ number of abilities there are.
-            for i in range(4):  # loop around the number of dice per ability (4).
-                scores_temp.append(randrange(1, 7))  # add it to the end of the temporary list
-            scores_temp.sort()  # sort list, so highest items
-            ability_score.append(scores_temp[-1] + scores_temp[-2] + scores_temp[-3])
-            scores_temp.clear()
+        self.surface = surface
+        self.tile = tile
+        self.rect = Rect(rect)
+        self.offset = (pos[0] - rect.x, pos[1] - rect.y)  # so the tile doesn't jump to the mouse
+        self.origin = origin
+        self.snapshot = surface.subsurface(self.rect).copy()  # what's under the tile, reused for every move
+        self.moves = 0
+        renderer.blit(surface, tile, self.rect)
+        renderer.mark(self.rect)
+
+    def move(self, pos: Tuple[int, int]) -> None:
+        """
+        Moves the tile to follow the mouse, touching only its old and new rects.
+        :param Tuple[int, int] pos: The mouse position.
+        :return: None
+        """
+        rect = self.rect.move(pos[0] - self.offset[0] - self.rect.x, pos[1] - self.offset[1] - self.rect.y)
+        rect = rect.clamp(self.surface.get_rect())
+        if rect == self.rect:
+            return
+        self.restore()
+        self.rect = rect
+        self.snapshot.blit(self.surface, (0, 0), rect)
+        renderer.blit(self.surface, self.tile, rect)
+        renderer.mark(rect)
+        self.moves += 1
 
-        self.stats["Strength"] = ability_score[0]
-        self.stats["Dexterity"] = ability_score[1]
-        self.stats["Charisma"] = ability_score[2]
-        self.stats["Constitution"] = ability_score[3]
-        self.stats["Intelligence"] = ability_score[4]
-        self.stats["Wisdom"] = ability_score[5]
+    def restore(self) -> None:
+        """
+        Puts back what was under the tile.
+        :return: None
+        """
+        renderer.blit(self.surface, self.snapshot, self.rect)
+        renderer.mark(self.rect)
 
-        return self.stats
 
-    def set_name(self, name) -> None:
+class HitGrid:
+    def __init__(self, images: list):
         """
-        Sets name of users chosen race.
-        :return: None
+        A uniform grid over the images' rects, so a mouse position can be turned into the one image under it without
+        checking every image. Cells are as big as the smallest image, so each cell overlaps only a few images.
+        :param list images: The Select objects, with their rects already set.
         """
-        self.race_name = name
+        self.cell_width = min(image.get_rect().width for image in images)
+        self.cell_height = min(image.get_rect().height for image in images)
+        self.cells = {}  # (column, row) -> indices of the images overlapping that cell
+        self.hovered = -1  # the index of the image last hovered over, -1 for none
+
+        for index, image in enumerate(images):
+            rect = image.get_rect()
+            for column in range(rect.left // self.cell_width, (rect.right - 1) // self.cell_width + 1):
+                for row in range(rect.top // self.cell_height, (rect.bottom - 1) // self.cell_height + 1):
+                    self.cells.setdefault((column, row), []).append(index)
+        self.images = images
 
-    def modifier(self, category: str, amount: int) -> dict:
+    def query(self, pos: Tuple[int, int]) -> int:
         """
-        Modifies the stats of the character chosen.
-        :param str category: The stat category we are manipulating, ie Strength, dex, etc.
-        :param int amount: The amount we are increasing that stat category by.
-        :return: The new dict.
+        Finds the image whose rect the position is in.
+        :param Tuple[int, int] pos: The position, ie of the mouse.
+        :return: The index of the image, -1 if there isn't one.
         """
-        self.stats[category] += amount
-        return self.stats
+        for index in self.cells.get((pos[0] // self.cell_width, pos[1] // self.cell_height), ()):
+            if self.images[index].get_rect().collidepoint(pos):
+                return index
+        return -1
+
+
+def init_pygame() -> None:
+    """
+    Starts the pygame subsystems the GUI uses, the display (with its events) and fonts. Everything else pygame.init()
+    would start, like audio, is never used.
+    :return: None
+    """
+    if not pygame.display.get_init():
+        pygame.display.init()
+    if not pygame.font.get_init():
+        pygame.font.init()
 
 
 class Main:
     def __init__(self):
-        self.surface = pygame.display.set_mode((WIDTH, HEIGHT))
-        self.races = ["Dragonborn", "Dwarf", "Elf", "Gnome", "Half-elf", "Half-orc", "Halfling", "Human", "Tiefling"]
-        self.classes = ["Barbarian", "Bard", "Cleric", "Druid", "Fighter", "Monk", "Paladin", "Ranger", "Rogue",
-                        "Sorcerer", "Warlock", "Wizard"]
-        self.race_description = {"Dragonborn": "Born of dragons, as their name proclaims, the dragonborn walk proudly "
-                                               "through a world that greets them with fearful incomprehension. Shaped "
-                                               "by draconic gods or the dragons themselves, dragonborn originally "
-                                               "hatched from dragon eggs as a unique race, combining the best "
-                                               "attributes of dragons and humanoids. Some dragonborn are faithful "
-                                               "servants to true dragons, others form the ranks of soldiers in great "
-                                               "wars, and still others find themselves adrift, with no clear calling "
-                                               "in life. Racial traits include your Strength score increasing by 2, "
-                                               "and your Charisma score increasing by 1.",
-
-                                 "Dwarf": "The members of this race are hearty and steadfast, standing about 4-1/2 "
-                                          "feet tall but powerfully built and extremely broad. They have a strong "
-                                          "connection to mountains and rocky places. They can live to be more than "
-                                          "400 years old. In game terms, dwarves receive a +2 to Constitution. "
-                                          "They also receive bonuses against poison, spells, and magical effects. "
-                                          "Dwarves also have darkvision, the ability to see up to 60 feet in the dark.",
-
-                                 "Human": "These are people just like you and us. They are adaptable, flexible, "
-                                          "and extremely ambitious. Compared to the other races, humans are "
-                                          "relatively short-lived. In game terms, humans get an extra feat on all "
-                                          "their stats.",
-
-                                 "Elf": "Elves have a strong connection to the natural world, especially woodlands. "
-                                          "They can live to be more than 700 years old. Known for being artists of "
-                                          "both song and magic, elves have an affinity for spell-casting and lore. "
-                                          "They stand about 5-1/2 feet tall, appearing graceful and frail. Elves "
-                                          "receive a +2 to Dexterity. They are immune to sleep effects and receive "
-                                          "a bonus against enchantment spells. Elves have low-light vision and a "
-                                          "racial bonus on Listen, Search, and Spot checks.",
-
-                                 "Halfling": "The members of this race are clever and capable — much more so than "
-                                             "their small size might indicate. Standing about 3 feet tall, with slim, "
-                                             "muscular builds, halflings are athletic and outgoing. Curious to a fault "
-                                             "and usually with a daring to match, halflings love to explore. They tend "
-                                             "to live well past 100. Halflings receive a +2 Dexterity to reflect their "
-                                             "small statures. They also receive bonuses to Climb, Jump, Listen, and "
-                                             "Move Silently checks, as well as a bonus to all saving throws due to "
-                                             "their fearlessness and ability to avoid damage.",
-
-                                 "Tiefling": "Tieflings tended to have an unsettling air about them, and most people "
-                                             "were uncomfortable around them, whether they were aware of the "
-                                             "tiefling's unsavory ancestry or not. While some looked like normal "
-                                             "humans, most retained physical characteristics derived from their "
-                                             "ancestor, with the most common such features being horns, "
-                                             "non-prehensile tails, and pointed teeth. Some tieflings also had eyes "
-                                             "that were solid orbs of black, red, white, silver, or gold, while "
-                                             "others had eyes more similar to those of humans. Other, more unusual "
-                                             "characteristics included a sulfurous odor, cloven feet, or a general "
-                                             "aura of discomfort they left on others. In game terms, get an "
-                                             "additional +2 in their charisma stat and a +1 in their intelligence.",
-
-                                 "Gnome": "Gnomes, or the Forgotten Folk as they were sometimes known, were small "
-                                          "humanoids known for their eccentric sense of humor, inquisitiveness, and "
-                                          "engineering prowess. Having had few overt influences on the world's history "
-                                          "but many small and unseen ones, gnomes were often overlooked by the powers "
-                                          "that be, despite their craftiness and affinity for illusion magic. Gnomes "
-                                          "were present in nearly every human city and most caravan-stop villages "
-                                          "where other cultures and non-human races were at least tolerated."
-                                          "In game terms- this character will increase your intelligence stat by +2.",
-
-                                 "Half-orc": "Half-orcs were humanoids born of both human and orc ancestry by a "
-                                             "multitude of means. Having the combined physical power of their orcish "
-                                             "ancestors with the agility of their human ones, half-orcs were "
-                                             "formidable individuals. Though they were often shunned in both human "
-                                             "and orcish society for different reasons, half-orcs have proven "
-                                             "themselves from time to time as worthy heroes and dangerous villains. "
-                                             "Their existence implied an interesting back story that most would not "
-                                             "like to dwell on. In game terms, your strength stat gets +2, whilst your "
-                                             "constitution stat gets a +1 bonus.",
-
-                                 "Half-elf": "Half-elves (also called Cha'Tel'Quessir in elven) were humanoids born "
-                                             "through the union of an elf and a human. Whether a half-elf was raised "
-                                             "by their human parent or their elven parent, they often felt isolated "
-                                             "and alone. Because they took around twenty years to reach adulthood, "
-                                             "they matured quickly when raised by elves, making them feel like an "
-                                             "outsider in either place. Like their elven parents, half-elves were "
-                                             "immune to the effects of the enchantment of magic, whilst also "
-                                             "inheriting the ability to see keenly in low-light conditions, with "
-                                             "little or no ill effect, and had enhanced senses of sight and hearing "
-                                             "compared to their human brethren. In game terms- they receive +2 in "
-                                             "Charisma, and +1 to any other ability scores."
-                                 }
+        init_pygame()
+        self.surface = pygame.display.set_mode((scaled(WIDTH), scaled(HEIGHT)))
+        self.races = list(RACES)
+        self.classes = list(CLASSES)
+        self.race_description = RACE_DESCRIPTIONS
 
         self.user_stats = {}
         self.mouse_pos = (0, 0)
         self.dnd_class = ""
         self.dnd_race = ""
-        self.image_check = 0
 
         self.stats_gen = StatsGenerator(stats=self.user_stats)
+        # the class screen can't be reached straight away, so its images load in the background.
+        assets.preload(self.classes)
         self.races = self.spawn(self.races, 200, 250, True, True, 0, 0)
-        self.classes = self.spawn(self.classes, 0, 0, False, True, 0, 0)
+        self.race_grid = HitGrid(self.races)
+        self.class_grid = None  # made by load_classes()
         self.back = Select(self.surface, "BACK", self.mouse_pos)
         self.roll = Select(self.surface, "Roll", self.mouse_pos)
-        self.box = Select(self.surface, "Box", self.mouse_pos)
+        self.boxes = {ability: Box(self.surface, "Box", ability) for ability in BOXES}
+        self.drag = None  # the tile being dragged between boxes, if there is one
+
+        # bake the hover images up front, so hovering never has to rewrite pixels.
+        for image in self.races:
+            image.bake((0, 0, 255), (0, 0, 0))
+        self.back.bake((133, 0, 255), (255, 0, 0))
+        self.roll.bake((0, 0, 255), (255, 255, 255))
 
         self.running = True
         self.choose_race = True
@@ -296,77 +398,169 @@ class Main:
         self.race_potential_index = -1  # the potential to select an image of a race
         self.class_potential_index = -1
         self.draw_once = True
+        self.last_input = 0  # when the last event was handled, in ticks()
+        self.last_drain = ticks()  # when the event queue was last emptied, in ticks()
+        self.latency = LatencyHistogram()  # how long events waited before being handled
+        # screen name -> what a click on that screen is offered to, in order, until one handles it.
+        self.click_handlers = {"race": [self.select_race], "class": [self.select_class, self.go_back],
+                               "roller": [self.go_back, self.press_roll, self.press_auto_assign]}
+        self.pacing = {}  # screen name -> frames, wakeups, CPU and wall time spent on it
 
-    def process(self) -> None:
+    def load_classes(self) -> None:
+        """
+        Makes the class images, the first time the class screen is shown.
+        :return: None
+        """
+        if self.class_grid is not None:
+            return
+        self.classes = self.spawn(self.classes, 0, 0, False, True, 0, 0)
+        for image in self.classes:
+            image.bake((236, 208, 208), (255, 255, 255))
+        self.class_grid = HitGrid(self.classes)
+
+    def process(self, event: Optional[pygame.event.Event] = None) -> None:
         """
         The main game process.
+        :param pygame.event.Event event: An event already taken off the queue, to handle instead of polling for one.
+        :return: None
+        """
+        # input first, so what's drawn this frame already reflects it.
+        self.check_events(event)
+        self.hover()
+
+        if self.screen() == "roller":
+            if self.begin_roll:  # if roll button is pressed.
+                self.stats_gen.set_name(self.races[self.race_potential_index].get_name())
+                self.user_stats = self.stats_gen.roll()
+                self.begin_roll = False  # so it won't continuously generate new rolls
+                self.draw_once = True  # show the new scores
+
+            # draw in the boxes, with the scores once they're rolled.
+            if self.draw_once:
+                self.draw_boxes()
+                self.draw_once = False
+
+            if self.drag is not None:
+                self.drag.move(self.mouse_pos)
+
+    def draw_boxes(self) -> None:
+        """
+        Draws a box for each ability with its title, and its score and racial increase if the stats have been rolled.
         :return: None
         """
+        increases = self.racial_increases() if self.user_stats else {}
+        for ability, box in self.boxes.items():
+            box.draw(scaled_point(BOXES[ability]))
+            box.title()
+            if ability in self.user_stats:
+                box.value = self.user_stats[ability]
+                box.show_value(increases[ability])
+
+        if self.user_stats:
+            button = scaled_rect(AUTO_ASSIGN)
+            self.surface.fill((255, 255, 255), button)
+            pygame.draw.rect(self.surface, (0, 0, 0), button, max(1, scaled(1)))
+            self.render_text("Auto-assign", AUTO_ASSIGN.x + 12, AUTO_ASSIGN.y + 6, (0, 0, 0), 22,
+                             update_rect=AUTO_ASSIGN)
+
+    def codes(self) -> Tuple[List[int], List[int]]:
+        """
+        The chosen race and class as codes, indices into RACES and CLASSES, in the one row batches rules.py works on.
+        :return: The race code, and the class code.
+        """
+        return [RACES.index(self.dnd_race)], [CLASSES.index(self.dnd_class)]
+
+    def racial_increases(self) -> Dict[str, int]:
+        """
+        How much the chosen race increases each ability, choices going to the abilities the class needs most.
+        :return: ability -> increase
+        """
+        races, classes = self.codes()
+        scores = [[0] * len(StatsGenerator.ABILITIES)]
+        increases = apply_racial_bonuses(scores, races, compile_classes().weights[classes])[0].tolist()
+        return dict(zip(StatsGenerator.ABILITIES, increases))
+
+    def start_drag(self) -> bool:
+        """
+        Picks up the score tile under the mouse, if there is one.
+        :return: True if a tile was picked up.
+        """
+        if not self.user_stats or self.drag is not None:
+            return False
+        for ability, box in self.boxes.items():
+            if box.tile_rect().collidepoint(self.mouse_pos):
+                box.show_value(self.racial_increases()[ability], tile=False)
+                self.drag = Drag(self.surface, make_tile(box.value), box.tile_rect(), self.mouse_pos, ability)
+                return True
+        return False
+
+    def drop(self) -> None:
+        """
+        Puts the dragged tile down. Dropped on another box, the two boxes swap scores, otherwise it goes back.
+        :return: None
+        """
+        self.drag.restore()
+        origin = self.drag.origin
+        target = next((ability for ability, box in self.boxes.items() if box.get_rect().collidepoint(self.mouse_pos)),
+                      origin)
+        self.drag = None
+        self.user_stats[origin], self.user_stats[target] = self.user_stats[target], self.user_stats[origin]
+        increases = self.racial_increases()
+        for ability in {origin, target}:
+            self.boxes[ability].value = self.user_stats[ability]
+            self.boxes[ability].show_value(increases[ability])
+
+    @profiler.timed("hover")
+    def hover(self) -> None:
+        """
+        Updates the hover highlights of the current screen for the mouse position.
+        :return: None
+        """
+        if self.drag is not None:
+            return  # nothing can be clicked while dragging, and redrawing a button could paint over the tile
+
         if not self.choose_race:
             self.back.mouse_pos = self.mouse_pos
             self.back.hover((133, 0, 255), (255, 0, 0))
 
         if self.choose_race:
-            self.hov_image(self.races, (0, 0, 255), (0, 0, 0))
+            self.hov_image(self.races, self.race_grid, (0, 0, 255), (0, 0, 0))
 
         elif self.choose_class:
-            self.hov_image(self.classes, (236, 208, 208), (255, 255, 255))
+            self.hov_image(self.classes, self.class_grid, (236, 208, 208), (255, 255, 255))
 
         elif self.dice_roller:
             self.roll.mouse_pos = self.mouse_pos
             self.roll.hover((0, 0, 255), (255, 255, 255))
-            if self.begin_roll:  # if roll button is pressed.
-                self.stats_gen.set_name(self.races[self.race_potential_index].get_name())
-                self.user_stats = self.stats_gen.roll()
-                self.begin_roll = False  # so it won't continuously generate new rolls
 
-            if self.user_stats:
-                # sort numbers into boxes/ stat categories, allow dragging.
-                ...
-            else:
-                # draw in the boxes
-                if self.draw_once:
-                    self.box.draw((25, 50))
-                    self.render_text("Wisdom", 48, 60, (0, 0, 0), 30, update_rect=(48, 60, 120, 25))
-                    self.box.draw((25, HEIGHT // 2 + 65))
-                    self.render_text("Strength", 48, HEIGHT // 2 + 73, (0, 0, 0), 30, update_rect=(48, HEIGHT // 2 + 75,
-                                                                                                   120, 25))
-                    self.box.draw((225, 50))
-                    self.render_text("Intelligence", 241, 60, (0, 0, 0), 25, update_rect=(241, 60, 120, 25))
-                    self.box.draw((225, HEIGHT // 2 + 65))
-                    self.render_text("Dexterity", 244, HEIGHT // 2 + 73, (0, 0, 0), 30, update_rect=(244, HEIGHT // 2 +
-                                                                                                     75, 120, 25))
-                    self.box.draw((425, 50))
-                    self.render_text("Constitution", 438, 60, (0, 0, 0), 25, update_rect=(438, 60, 125, 25))
-                    self.box.draw((425, HEIGHT // 2 + 65))
-                    self.render_text("Charisma", 444, HEIGHT // 2 + 73, (0, 0, 0), 30, update_rect=(444, HEIGHT // 2 +
-                                                                                                    73, 120, 25))
-                    self.draw_once = False
-
-        self.check_events()
-        self.image_check += 1
-
-    def hov_image(self, images: list, colour_r: Tuple[int, int, int], colour_o: Tuple[int, int, int]) -> None:
+    def hov_image(self, images: list, grid: HitGrid, colour_r: Tuple[int, int, int], colour_o: Tuple[int, int, int]) \
+            -> None:
         """
         Manages all hovering actions of the mouse on an image, and anything the user selects (as a result).
         :param list images: Image list.
+        :param HitGrid grid: The hit grid built from the image list's layout.
         :param Tuple[int, int, int] colour_r: The replacement of the original colour, if mouse is over an image.
         :param Tuple[int, int, int] colour_o: The original colour which will be replaced or regained.
         :return: None
         """
-        try:
-            images[self.image_check]
-        except IndexError:
-            self.image_check = 0
+        index = grid.query(self.mouse_pos)
+        if grid.hovered not in (-1, index):
+            # the mouse has left the image it was over, so put its border back.
+            images[grid.hovered].mouse_pos = self.mouse_pos
+            images[grid.hovered].hover(colour_r, colour_o, False)
+        grid.hovered = index
 
-        images[self.image_check].mouse_pos = self.mouse_pos
-        images[self.image_check].hover(colour_r, colour_o, False)
+        if index == -1:
+            return
 
-        if images[self.image_check].is_selectable() and self.choose_race:
-            self.race_potential_index = self.image_check
+        images[index].mouse_pos = self.mouse_pos
+        images[index].hover(colour_r, colour_o, False)
 
-        elif images[self.image_check].is_selectable() and self.choose_class:
-            self.class_potential_index = self.image_check
+        if images[index].is_selectable() and self.choose_race:
+            self.race_potential_index = index
+
+        elif images[index].is_selectable() and self.choose_class:
+            self.class_potential_index = index
 
     def set(self, classes: bool = False, roller: bool = False) -> None:
         """
@@ -380,14 +574,12 @@ class Main:
             self.dnd_race = self.races[self.race_potential_index].get_name()
 
             # add a background for description of character
-            self.surface.fill((0, 0, 0), Rect(0, 0, 300, 750))
-            pygame.display.update(Rect(0, 0, 300, 750))
+            self.surface.fill((0, 0, 0), scaled_rect((0, 0, 300, 750)))
+            renderer.mark(scaled_rect((0, 0, 300, 750)))
 
             # add chosen image to top left screen
-            image_px_array = pygame.PixelArray(self.races[self.race_potential_index].get_image())
-            image_px_array.replace((0, 0, 255), (0, 0, 0))
-            image_px_array.close()
-            self.races[self.race_potential_index].draw((50, 25), False)
+            self.races[self.race_potential_index].unhighlight((0, 0, 255), (0, 0, 0))
+            self.races[self.race_potential_index].draw(scaled_point((50, 25)), False)
 
             # add back button
             self.back.draw((0, 0))
@@ -397,7 +589,9 @@ class Main:
             self.render_text(render_string, 20, 300, (255, 255, 255), 16, 20)
 
             # spawn new images
+            self.load_classes()
             self.spawn(self.classes, 100, 187, True, False, 300, 0)
+            self.class_grid = HitGrid(self.classes)
 
             # set new variables.
             self.choose_race = False
@@ -410,58 +604,139 @@ class Main:
 
             # reset screen to white.
             self.surface.fill((255, 255, 255))
-            pygame.display.update()
+            renderer.mark(self.surface.get_rect())
 
             # display button to begin roll.
-            self.roll.draw(((WIDTH // 2) - 50, HEIGHT // 2 - 60))
+            self.roll.draw(scaled_point(((WIDTH // 2) - 50, HEIGHT // 2 - 60)))
+            self.user_stats.clear()  # stats rolled for another class aren't shown
 
             # switch bool variables.
             self.dice_roller = True
             self.choose_class = False
+            # the class is left highlighted otherwise, and drawn that way if the user goes back to the class screen.
+            self.classes[self.class_potential_index].unhighlight((236, 208, 208), (255, 255, 255))
             self.classes[self.class_potential_index].set_selectable(False)
 
-    def check_events(self) -> None:
+    @profiler.timed("events")
+    def check_events(self, event: Optional[pygame.event.Event] = None) -> None:
         """
-        Checks for any pygame events.
+        Handles every pygame event waiting, so none are left for later frames. Mouse movements are coalesced, and each
+        click goes to the handlers of the screen it lands on.
+        :param pygame.event.Event event: An event already taken off the queue, handled before the rest.
         :return: None
         """
-        event = pygame.event.poll()  # gets one event at a time- stops our use of for loop in main loop.
-        if event.type == MOUSEMOTION:  # if mouse is moved
-            self.mouse_pos = pygame.mouse.get_pos()  # get it's new position
+        events = [] if event is None or event.type == NOEVENT else [event]
+        events += pygame.event.get()
+        now = ticks()
+        if events:
+            self.last_input = now
+
+        for event in coalesce(events):
+            if event.type == MOUSEMOTION:  # if mouse is moved
+                self.mouse_pos = event.pos  # get it's new position
+
+            elif event.type == MOUSEBUTTONDOWN:
+                self.mouse_pos = event.pos
+                if self.screen() != "roller" or not self.start_drag():
+                    continue
+
+            elif event.type == MOUSEBUTTONUP:
+                self.mouse_pos = event.pos
+                if self.drag is not None:
+                    self.drop()
+                else:
+                    # hover where the click happened first, in case the mouse moved there since the last frame.
+                    self.hover()
+                    for handler in self.click_handlers[self.screen()]:
+                        if handler():
+                            break
+
+            elif (event.type == QUIT) or (event.type == KEYDOWN and event.key == K_ESCAPE):
+                # if X is pressed or ESC is pressed
+                self.running = False  # end program
 
-        if event.type == MOUSEBUTTONUP and self.races[self.race_potential_index].is_selectable() and self.choose_race:
+            else:
+                continue
+
+            # events posted with a time say exactly when they arrived, otherwise it was some time since the last drain.
+            self.latency.add(ticks() - event.dict.get("time", self.last_drain))
+        self.last_drain = now
+
+    def select_race(self) -> bool:
+        """
+        Click handler of the race screen, moves onto the class screen if a race was clicked.
+        :return: True if the click was handled.
+        """
+        if self.races[self.race_potential_index].is_selectable():
             # if the mouse selects something on the screen and the user is selecting their race.
-            # set original rect so, we can re-arrange race menu accordingly later.
             self.set(True)
+            return True
+        return False
 
-        elif event.type == MOUSEBUTTONUP and self.classes[self.class_potential_index].is_selectable() and \
-                self.choose_class:
+    def select_class(self) -> bool:
+        """
+        Click handler of the class screen, moves onto the dice roller if a class was clicked.
+        :return: True if the click was handled.
+        """
+        if self.classes[self.class_potential_index].is_selectable():
             # once we have selected our class, we move onto the dice roller
             self.set(roller=True)
+            return True
+        return False
 
-        elif event.type == MOUSEBUTTONUP and self.back.is_selectable():
-            # if we have clicked on the back button.
-            if self.choose_class:
-                self.choose_class = False
-                self.choose_race = True
+    def go_back(self) -> bool:
+        """
+        Click handler of the back button, goes back a screen.
+        :return: True if the click was handled.
+        """
+        if not self.back.is_selectable():
+            return False
+
+        if self.choose_class:
+            self.choose_class = False
+            self.choose_race = True
+            # redraw the race menu, as only the image under the mouse gets drawn while hovering.
+            self.surface.fill((0, 0, 0))
+            renderer.mark(self.surface.get_rect())
+            self.spawn(self.races, 200, 250, True, False, 0, 0)
+            self.race_grid.hovered = -1
 
-            elif self.dice_roller:
-                self.draw_once = True
-                self.set(True)
+        elif self.dice_roller:
+            self.draw_once = True
+            self.set(True)
+        return True
+
+    def press_auto_assign(self) -> bool:
+        """
+        Click handler of the auto-assign button, rearranges the rolled scores to suit the chosen class and race.
+        :return: True if the click was handled.
+        """
+        if not self.user_stats or not scaled_rect(AUTO_ASSIGN).collidepoint(self.mouse_pos):
+            return False
+        scores = [[self.user_stats[ability] for ability in StatsGenerator.ABILITIES]]
+        for ability, score in zip(StatsGenerator.ABILITIES, assign_scores(scores, *self.codes())[0].tolist()):
+            self.user_stats[ability] = score
+        self.draw_once = True
+        return True
 
-        elif event.type == MOUSEBUTTONUP and self.roll.is_selectable():
+    def press_roll(self) -> bool:
+        """
+        Click handler of the roll button.
+        :return: True if the click was handled.
+        """
+        if self.roll.is_selectable():
             # if we have pressed the roll button.
             self.begin_roll = True
+            return True
+        return False
 
-        elif (event.type == QUIT) or (event.type == KEYDOWN and event.key == K_ESCAPE):
-            # if X is pressed or ESC is pressed
-            self.running = False  # end program
-
+    @profiler.timed("text")
     def render_text(self, text: str, x_start: int, y_start: int, rgb: Tuple[int, int, int], font_size: int,
                     y_increment: int = 0, limit: int = 37,
                     update_rect: Tuple[int, int, int, int] = (0, 300, 300, 450)) -> None:
         """
-        Renders the score. For loop in here should be alright as we're loading a new selection page for the user.
+        Renders the score. For loop in here should be alright as we're loading a new selection page for the user. Every
+        position and size is in layout units.
         :param int y_increment: How much the y axis will be incremented.
         :param str text: The message we are displaying on the screen.
         :param int x_start: The top left corner of the message in the x position.
@@ -472,29 +747,13 @@ class Main:
         :param Tuple[int, int, int, int] update_rect: The rect to which we will update the screen.
         :return: None
         """
-        split_text = text.split(" ")  # splits text
-        font = pygame.font.SysFont("Calibri", font_size)  # gathers type of font and size
-        temp_text = ""  # temporary string
-
-        if len(split_text) == 1:
-            temp_text = text
+        # rendered text is kept, so showing the same message again is only a blit.
+        for line in text_cache.render(text, scaled(font_size), rgb, limit):
+            renderer.blit(self.surface, line, scaled_point((x_start, y_start)))  # blit text at coordinates
+            y_start += y_increment  # increment y axis
 
-        else:
-            for word in split_text:  # for each word in the split text variable.
-                if len(word) + len(temp_text) < limit:  # if length of word and length of temporary string has not
-                    # reached the limit
-                    temp_text += f"{word} "  # add the word on the temporary string.
-                else:
-                    text_surface = font.render(temp_text, False, rgb)  # make text surface
-                    self.surface.blit(text_surface, [x_start, y_start])  # blit text at coordinates
-                    temp_text = f"{word} "  # any word carried over is the start of the new temporary string.
-                    y_start += y_increment  # increment y axis
-
-        # in case loop stopped and there was some left over text, render and blit it.
-        text_surface = font.render(temp_text, False, rgb)
-        self.surface.blit(text_surface, [x_start, y_start])
         # update screen
-        pygame.display.update(Rect(update_rect))
+        renderer.mark(scaled_rect(update_rect))
 
     def spawn(self, image_list: list, x_increment: int, y_increment: int, draw: bool, make_class: bool, x_start: int,
               y_start: int) -> List:
@@ -507,6 +766,7 @@ class Main:
         :param bool make_class: True, if we want to make the images an object, False, otherwise.
         :param int x_start: Where the x position will start.
         :param int y_start: Where the y position will start.
+        Positions and increments are in layout units.
         :return: The new object list
         """
         x = x_start
@@ -515,28 +775,116 @@ class Main:
             if make_class:
                 image_list[counter] = Select(self.surface, image_list[counter], self.mouse_pos)
             if draw:
-                image_list[counter].draw((x, y))
+                image_list[counter].draw(scaled_point((x, y)))
 
             x += x_increment
-            if x == 600:
+            if x == WIDTH:
                 y += y_increment
                 x = x_start
 
         if make_class:
             return image_list
 
-    def run(self) -> None:
+    def screen(self) -> str:
+        """
+        The name of the screen being shown.
+        :return: str
+        """
+        if self.choose_race:
+            return "race"
+        elif self.choose_class:
+            return "class"
+        return "roller"
+
+    def is_idle(self) -> bool:
+        """
+        Whether nothing on the screen can change until the next event: no events are waiting, there's nothing left to
+        draw, and the user hasn't done anything (ie moved the mouse over an image) in the last ACTIVE_TIME.
+        :return: bool
+        """
+        if pygame.event.peek() or self.begin_roll or (self.screen() == "roller" and self.draw_once):
+            return False
+        return ticks() - self.last_input >= ACTIVE_TIME
+
+    def pacing_report(self) -> str:
+        """
+        Frames, wakeups from sleeping, and CPU time spent on each screen so far.
+        :return: str
+        """
+        lines = []
+        for screen, stats in self.pacing.items():
+            lines.append(f"{screen:>6}: {stats['frames']} frames, {stats['wakeups']} wakeups, "
+                         f"{stats['cpu']:.3f}s CPU over {stats['wall']:.3f}s "
+                         f"({100 * stats['cpu'] / max(stats['wall'], 1e-9):.1f}%)")
+        return "\n".join(lines)
+
+    def draw_overlay(self) -> None:
+        """
+        Draws the FPS and the time each phase took last frame along the bottom of the screen.
+        :return: None
+        """
+        times = " ".join(f"{name} {ms * 1000:.2f}" for name, ms in zip(PHASES, profiler.last_frame))
+        text = get_font(scaled(14)).render(f"FPS {FPS_Clock.get_fps():.1f} | ms: {times}", False, (255, 255, 255))
+        width, height = self.surface.get_size()
+        rect = Rect(0, height - text.get_height() - 2, width, text.get_height() + 2)
+        self.surface.fill((0, 0, 0), rect)
+        renderer.blit(self.surface, text, (2, rect.top + 1))
+        renderer.mark(rect)
+
+    def run(self, adaptive: bool = True) -> None:
         """
         Controls main game loop
+        :param bool adaptive: Sleep until the next event while the screen is idle, rather than running at FPS all the
+        time.
         :return: None
         """
         while self.running:
-            self.process()
-            # set the caption to show the FPS to two decimal places
-            pygame.display.set_caption(f"FPS: {FPS_Clock.get_fps():4.2f}")
+            screen = self.screen()
+            stats = self.pacing.setdefault(screen, {"frames": 0, "wakeups": 0, "cpu": 0.0, "wall": 0.0})
+            cpu, wall = process_time(), perf_counter()
+
+            event = None
+            if adaptive and self.is_idle():
+                # nothing will change until something happens, so sleep until it does.
+                event = pygame.event.wait(IDLE_TIMEOUT)
+                # whatever woke the loop arrived just now, not when the queue was drained before going to sleep.
+                self.last_drain = ticks()
+                stats["wakeups"] += 1
+
+            with profiler.phase("frame"):
+                self.process(event)
+                if profiler.overlay:
+                    self.draw_overlay()
+                else:
+                    # set the caption to show the FPS to two decimal places
+                    pygame.display.set_caption(f"FPS: {FPS_Clock.get_fps():4.2f}")
+                renderer.flush()  # push everything drawn this frame to the display at once
             FPS_Clock.tick(FPS)
 
+            stats["frames"] += 1
+            stats["cpu"] += process_time() - cpu
+            stats["wall"] += perf_counter() - wall
+
 
 if __name__ == "__main__":
+    parser = ArgumentParser(description="D&D character creator.")
+    parser.add_argument("--profile", metavar="TRACE", help="time each frame, and save a Chrome trace here on exit")
+    parser.add_argument("--overlay", action="store_true", help="show frame phase times on screen, with --profile")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--scale", type=float, help=f"draw everything this many times bigger than {WIDTH}x{HEIGHT}")
+    size.add_argument("--resolution", metavar="WxH", help="the biggest window to fit, ie 1080x1920 for a kiosk screen")
+    args = parser.parse_args()
+    if args.resolution:
+        width, height = (int(side) for side in args.resolution.lower().split("x"))
+        configure(min(width / WIDTH, height / HEIGHT))
+    elif args.scale:
+        configure(args.scale)
+    profiler.enabled = bool(args.profile)
+    profiler.overlay = args.overlay and profiler.enabled
+
     program = Main()
     program.run()
+
+    if profiler.enabled:
+        profiler.chrome_trace(args.profile)
+        print(profiler.summary())
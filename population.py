@@ -0,0 +1,252 @@
+"""
+Statistics of a generated population, kept in constant memory however many characters go through, per race and class.
+Every part is mergeable, so shards rolled in separate processes (or runs, see save() and load()) give the same report
+as one run over everything.
+Usage: python population.py shard0.npz shard1.npz --by race
+"""
+from argparse import ArgumentParser
+from typing import *
+
+import numpy
+
+from character import CLASSES, RACES, CharacterBatch, StatsGenerator
+
+SCORES = 256  # stats are uint8, so every score has its own histogram bucket
+
+
+def merge_moments(count: numpy.ndarray, mean: numpy.ndarray, m2: numpy.ndarray, other_count: numpy.ndarray,
+                  other_mean: numpy.ndarray, other_m2: numpy.ndarray) \
+        -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Chan's parallel form of Welford's algorithm: the moments of two sets of values together, from each set's moments.
+    :param numpy.ndarray count: The first set's counts.
+    :param numpy.ndarray mean: The first set's means.
+    :param numpy.ndarray m2: The first set's sums of squared differences from the mean.
+    :param numpy.ndarray other_count: The second set's counts.
+    :param numpy.ndarray other_mean: The second set's means.
+    :param numpy.ndarray other_m2: The second set's sums of squared differences from the mean.
+    :return: The count, mean and m2 of both.
+    """
+    total = count + other_count
+    delta = other_mean - mean
+    share = numpy.divide(other_count, total, out=numpy.zeros(numpy.shape(total)), where=total > 0)
+    return total, mean + delta * share, m2 + other_m2 + delta ** 2 * count * share
+
+
+class Moments:
+    def __init__(self, shape: Tuple[int, ...]):
+        """
+        Count, mean and sum of squared differences from the mean, for many series at once. Batches are folded in with
+        merge_moments(), which stays accurate where sums of squares would lose precision.
+        :param Tuple[int, ...] shape: One series per element.
+        """
+        self.count = numpy.zeros(shape, dtype=numpy.int64)
+        self.mean = numpy.zeros(shape)
+        self.m2 = numpy.zeros(shape)
+
+    def merge(self, count: numpy.ndarray, mean: numpy.ndarray, m2: numpy.ndarray) -> None:
+        """
+        Folds in the moments of other values of the same series.
+        :param numpy.ndarray count: Their counts.
+        :param numpy.ndarray mean: Their means.
+        :param numpy.ndarray m2: Their sums of squared differences from their means.
+        :return: None
+        """
+        self.count, self.mean, self.m2 = merge_moments(self.count, self.mean, self.m2, count, mean, m2)
+
+    def add(self, values: numpy.ndarray, groups: numpy.ndarray) -> None:
+        """
+        Folds in a batch of values.
+        :param numpy.ndarray values: (n, series) values, one column per series of a group.
+        :param numpy.ndarray groups: (n,) which group each row belongs to, the first axis of the shape.
+        :return: None
+        """
+        size = self.count.shape[0]
+        values = values.astype(numpy.float64)
+        count = numpy.bincount(groups, minlength=size)
+        sums = numpy.stack([numpy.bincount(groups, column, size) for column in values.T], axis=1)
+        mean = sums / numpy.maximum(count, 1)[:, None]
+        deviations = (values - mean[groups]) ** 2
+        m2 = numpy.stack([numpy.bincount(groups, column, size) for column in deviations.T], axis=1)
+        self.merge(numpy.broadcast_to(count[:, None], mean.shape), mean, m2)
+
+    def combine(self, groups: numpy.ndarray, size: int) -> "Moments":
+        """
+        Merges series together, ie every class of a race into one.
+        :param numpy.ndarray groups: The new group of each first-axis element.
+        :param int size: The number of new groups.
+        :return: Moments
+        """
+        combined = Moments((size,) + self.count.shape[1:])
+        for old, group in enumerate(groups):
+            combined.count[group], combined.mean[group], combined.m2[group] = merge_moments(
+                combined.count[group], combined.mean[group], combined.m2[group],
+                self.count[old], self.mean[old], self.m2[old])
+        return combined
+
+    def variance(self) -> numpy.ndarray:
+        """
+        The sample variance of each series, nan where there are fewer than two values.
+        :return: numpy.ndarray
+        """
+        return numpy.divide(self.m2, self.count - 1, out=numpy.full(self.m2.shape, numpy.nan), where=self.count > 1)
+
+
+class QuantileSketch:
+    def __init__(self, groups: int, accuracy: float = 0.01, highest: float = 1 << 16):
+        """
+        Quantiles to within a relative accuracy, in fixed memory, like DDSketch: values are counted in buckets whose
+        bounds grow geometrically, so each bucket's midpoint is within accuracy of every value in it. Sketches merge by
+        adding their counts.
+        :param int groups: The number of separate series.
+        :param float accuracy: The largest relative error of a quantile.
+        :param float highest: Values above this are counted as this.
+        """
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.buckets = int(numpy.ceil(numpy.log(highest) / numpy.log(self.gamma))) + 1
+        self.counts = numpy.zeros((groups, self.buckets), dtype=numpy.int64)  # bucket 0 counts values of 1 and below
+
+    def add(self, values: numpy.ndarray, groups: numpy.ndarray) -> None:
+        """
+        Counts a batch of values.
+        :param numpy.ndarray values: (n,) positive values.
+        :param numpy.ndarray groups: (n,) which series each belongs to.
+        :return: None
+        """
+        keys = numpy.ceil(numpy.log(numpy.maximum(values, 1)) / numpy.log(self.gamma)).astype(numpy.int64)
+        keys = numpy.minimum(keys, self.buckets - 1)
+        self.counts += numpy.bincount(groups * self.buckets + keys,
+                                      minlength=self.counts.size).reshape(self.counts.shape)
+
+    def quantile(self, counts: numpy.ndarray, q: float) -> float:
+        """
+        A quantile of one series, or of several added together.
+        :param numpy.ndarray counts: (buckets,) counts, ie counts[group] or counts[groups].sum(axis=0).
+        :param float q: From 0 to 1.
+        :return: The value, nan if the series is empty.
+        """
+        total = counts.sum()
+        if not total:
+            return numpy.nan
+        key = int(numpy.searchsorted(numpy.cumsum(counts), q * (total - 1), side="right"))
+        return 2 * self.gamma ** key / (self.gamma + 1) if key else 1.0
+
+
+class PopulationStats:
+    def __init__(self):
+        """
+        Histograms of every score, moments of every ability and the total, and a quantile sketch of the totals, for each
+        race and class pair. Reports per race or per class merge the pairs.
+        """
+        groups = len(RACES) * len(CLASSES)
+        abilities = len(StatsGenerator.ABILITIES)
+        self.histograms = numpy.zeros((groups, abilities, SCORES), dtype=numpy.int64)
+        self.moments = Moments((groups, abilities + 1))  # the last column is the total
+        self.totals = QuantileSketch(groups)
+
+    def add(self, batch: CharacterBatch) -> None:
+        """
+        Folds in a batch of characters, ie a chunk from generate.generate_chunk().
+        :param CharacterBatch batch: The characters.
+        :return: None
+        """
+        groups = batch.races.astype(numpy.int64) * len(CLASSES) + batch.classes
+        abilities = len(StatsGenerator.ABILITIES)
+        # one bincount over (group, ability, score) keys fills every histogram at once.
+        keys = (groups[:, None] * abilities + numpy.arange(abilities)) * SCORES + batch.stats
+        self.histograms += numpy.bincount(keys.ravel(), minlength=self.histograms.size).reshape(self.histograms.shape)
+        totals = batch.stats.sum(axis=1, dtype=numpy.int64)
+        self.moments.add(numpy.column_stack([batch.stats, totals]), groups)
+        self.totals.add(totals, groups)
+
+    def merge(self, other: "PopulationStats") -> "PopulationStats":
+        """
+        Folds in the statistics of another shard.
+        :param PopulationStats other: The shard.
+        :return: self, so shards can be folded with functools.reduce.
+        """
+        self.histograms += other.histograms
+        self.moments.merge(other.moments.count, other.moments.mean, other.moments.m2)
+        self.totals.counts += other.totals.counts
+        return self
+
+    def save(self, path: str) -> None:
+        """
+        Writes the statistics to an .npz file, to merge with other runs later.
+        :param str path: Where to write them.
+        :return: None
+        """
+        numpy.savez(path, histograms=self.histograms, count=self.moments.count, mean=self.moments.mean,
+                    m2=self.moments.m2, totals=self.totals.counts)
+
+    @classmethod
+    def load(cls, path: str) -> "PopulationStats":
+        """
+        Reads statistics written by save().
+        :param str path: The .npz file.
+        :return: PopulationStats
+        """
+        stats = cls()
+        with numpy.load(path) as file:
+            stats.histograms = file["histograms"]
+            stats.moments.count, stats.moments.mean, stats.moments.m2 = file["count"], file["mean"], file["m2"]
+            stats.totals.counts = file["totals"]
+        return stats
+
+    def report(self, by: Optional[str] = None) -> str:
+        """
+        A table of each ability's mean, standard deviation and median, and the totals' mean, deviation and 5th, 50th
+        and 95th percentiles.
+        :param str by: "race", "class", or None for the whole population in one row.
+        :return: str
+        """
+        if by == "race":
+            names, groups = RACES, numpy.repeat(numpy.arange(len(RACES)), len(CLASSES))
+        elif by == "class":
+            names, groups = CLASSES, numpy.tile(numpy.arange(len(CLASSES)), len(RACES))
+        else:
+            names, groups = ("all",), numpy.zeros(len(RACES) * len(CLASSES), dtype=numpy.int64)
+        moments = self.moments.combine(groups, len(names))
+        deviations = numpy.sqrt(moments.variance())
+
+        header = "".join(f"{ability[:3]:>16}" for ability in StatsGenerator.ABILITIES)
+        lines = [f"{'':>10}{'count':>10}{header}{'total':>16}{'p5':>6}{'p50':>6}{'p95':>6}"]
+        for group, name in enumerate(names):
+            histograms = self.histograms[groups == group].sum(axis=0)
+            totals = self.totals.counts[groups == group].sum(axis=0)
+            count = int(moments.count[group, 0])
+            cells = []
+            for ability in range(len(StatsGenerator.ABILITIES) + 1):
+                cell = f"{moments.mean[group, ability]:.2f}±{deviations[group, ability]:.2f}"
+                if ability < len(StatsGenerator.ABILITIES) and count:
+                    # the histograms are exact, so this is the true median.
+                    median = int(numpy.searchsorted(numpy.cumsum(histograms[ability]), (count + 1) // 2))
+                    cell += f" {median}"
+                cells.append(f"{cell:>16}")
+            percentiles = "".join(f"{self.totals.quantile(totals, q):>6.1f}" for q in (0.05, 0.5, 0.95))
+            lines.append(f"{name:>10}{count:>10}{''.join(cells)}{percentiles}")
+        return "\n".join(lines)
+
+
+def aggregate(batches: Iterable[CharacterBatch]) -> PopulationStats:
+    """
+    Folds a stream of batches into one set of statistics, keeping none of the batches.
+    :param Iterable[CharacterBatch] batches: ie generate_chunk() for each chunk of a run.
+    :return: PopulationStats
+    """
+    stats = PopulationStats()
+    for batch in batches:
+        stats.add(batch)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Merge population statistics and print a report.")
+    parser.add_argument("shards", nargs="+", help=".npz files written by generate.py --format stats")
+    parser.add_argument("--by", choices=("race", "class"), help="one row per race or per class")
+    args = parser.parse_args()
+
+    merged = PopulationStats.load(args.shards[0])
+    for shard in args.shards[1:]:
+        merged.merge(PopulationStats.load(shard))
+    print(merged.report(args.by))
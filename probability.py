@@ -0,0 +1,212 @@
+from fractions import Fraction
+from functools import lru_cache
+from itertools import combinations_with_replacement
+from math import comb, factorial
+from typing import *
+
+
+class DiceScheme(NamedTuple):
+    """
+    How a single ability score is rolled: roll `dice` dice with `sides` faces, and add up the `keep` highest. Faces at
+    or below `reroll` are rerolled until they come up higher.
+    """
+    dice: int = 4
+    sides: int = 6
+    keep: int = 3
+    reroll: int = 0
+
+
+FOUR_D6_DROP_LOWEST = DiceScheme(4, 6, 3)  # the scheme used by StatsGenerator.roll
+THREE_D6 = DiceScheme(3, 6, 3)
+FOUR_D6_REROLL_ONES = DiceScheme(4, 6, 3, reroll=1)
+
+
+def modifier(score: int) -> int:
+    """
+    The ability modifier for a score, ie 10-11 gives +0, 12-13 gives +1, 8-9 gives -1.
+    :param int score: The ability score.
+    :return: int
+    """
+    return (score - 10) // 2
+
+
+def convolve(first: Dict[int, Fraction], second: Dict[int, Fraction]) -> Dict[int, Fraction]:
+    """
+    Distribution of the sum of two independent outcomes.
+    :param Dict[int, Fraction] first: Probability of each value of the first outcome.
+    :param Dict[int, Fraction] second: Probability of each value of the second outcome.
+    :return: Probability of each value of their sum.
+    """
+    result = {}
+    for a, p in first.items():
+        for b, q in second.items():
+            result[a + b] = result.get(a + b, 0) + p * q
+    return dict(sorted(result.items()))
+
+
+class Distribution:
+    def __init__(self, probabilities: Dict[int, Fraction]):
+        self.probabilities = dict(sorted(probabilities.items()))
+        self.low = min(self.probabilities)
+        self.high = max(self.probabilities)
+
+        # tail[i] is P(X >= low + i), so any threshold query is a single lookup.
+        self.tail = [Fraction(0)] * (self.high - self.low + 2)
+        for value in range(self.high, self.low - 1, -1):
+            self.tail[value - self.low] = self.tail[value - self.low + 1] + self.probabilities.get(value, 0)
+
+    def __getitem__(self, value: int) -> Fraction:
+        return self.probabilities.get(value, Fraction(0))
+
+    def at_least(self, value: int) -> Fraction:
+        """
+        P(X >= value).
+        :param int value: The threshold.
+        :return: Fraction
+        """
+        if value <= self.low:
+            return Fraction(1)
+        if value > self.high:
+            return Fraction(0)
+        return self.tail[value - self.low]
+
+    def at_most(self, value: int) -> Fraction:
+        """
+        P(X <= value).
+        :param int value: The threshold.
+        :return: Fraction
+        """
+        return 1 - self.at_least(value + 1)
+
+    def mean(self) -> Fraction:
+        """
+        The expected value.
+        :return: Fraction
+        """
+        return sum(value * p for value, p in self.probabilities.items())
+
+    def items(self):
+        return self.probabilities.items()
+
+
+class ProbabilityEngine:
+    def __init__(self, scheme: DiceScheme = FOUR_D6_DROP_LOWEST, abilities: int = 6):
+        """
+        Exact distributions for a character's ability scores, worked out once from the dice rather than by sampling.
+        :param DiceScheme scheme: How each ability score is rolled.
+        :param int abilities: How many ability scores a character has.
+        """
+        if not 0 < scheme.keep <= scheme.dice:
+            raise ValueError(f"can't keep {scheme.keep} of {scheme.dice} dice")
+        if not 0 <= scheme.reroll < scheme.sides:
+            raise ValueError(f"can't reroll {scheme.reroll} or lower on a d{scheme.sides}")
+
+        self.scheme = scheme
+        self.abilities = abilities
+        self.score = Distribution(self._score())
+        self.total = Distribution(self._sum_of(self.score.probabilities))
+        self.modifier = Distribution(self._modifiers())
+        self.total_modifier = Distribution(self._sum_of(self.modifier.probabilities))
+        self._sorted = None
+
+    def _score(self) -> Dict[int, Fraction]:
+        """
+        Distribution of one ability score. Goes over each multiset of faces once, weighted by how many orderings of the
+        dice give it, instead of every ordering separately.
+        :return: Dict[int, Fraction]
+        """
+        faces = range(self.scheme.reroll + 1, self.scheme.sides + 1)
+        face_p = Fraction(1, len(faces))
+        result = {}
+        for roll in combinations_with_replacement(faces, self.scheme.dice):
+            orderings = factorial(self.scheme.dice)
+            for face in set(roll):
+                orderings //= factorial(roll.count(face))
+            score = sum(roll[-self.scheme.keep:])  # rolls come out sorted, so the highest are at the end.
+            result[score] = result.get(score, 0) + orderings * face_p ** self.scheme.dice
+        return result
+
+    def _sum_of(self, single: Dict[int, Fraction]) -> Dict[int, Fraction]:
+        """
+        Distribution of the sum of every ability, by repeated convolution.
+        :param Dict[int, Fraction] single: Distribution of one ability.
+        :return: Dict[int, Fraction]
+        """
+        result = {0: Fraction(1)}
+        for _ in range(self.abilities):
+            result = convolve(result, single)
+        return result
+
+    def _modifiers(self) -> Dict[int, Fraction]:
+        """
+        Distribution of one ability modifier.
+        :return: Dict[int, Fraction]
+        """
+        result = {}
+        for score, p in self.score.items():
+            result[modifier(score)] = result.get(modifier(score), 0) + p
+        return result
+
+    def count_at_least(self, value: int) -> Distribution:
+        """
+        Distribution of how many of a character's scores are at least value.
+        :param int value: The threshold.
+        :return: Distribution
+        """
+        p = self.score.at_least(value)
+        return Distribution({k: comb(self.abilities, k) * p ** k * (1 - p) ** (self.abilities - k)
+                             for k in range(self.abilities + 1)})
+
+    def at_least_one(self, value: int) -> Fraction:
+        """
+        P(at least one score >= value), ie at_least_one(18) is the chance of rolling an 18 somewhere.
+        :param int value: The threshold.
+        :return: Fraction
+        """
+        return 1 - (1 - self.score.at_least(value)) ** self.abilities
+
+    def order_statistic(self, rank: int) -> Distribution:
+        """
+        Distribution of a position in the sorted scores, 0 being the lowest and abilities - 1 the highest.
+        :param int rank: The position in ascending order.
+        :return: Distribution
+        """
+        if not 0 <= rank < self.abilities:
+            raise IndexError(rank)
+
+        def at_most(value):
+            # the rank-th lowest is at most value when at least rank + 1 of the scores are.
+            f = self.score.at_most(value)
+            return sum(comb(self.abilities, j) * f ** j * (1 - f) ** (self.abilities - j)
+                       for j in range(rank + 1, self.abilities + 1))
+
+        return Distribution({value: at_most(value) - at_most(value - 1)
+                             for value in range(self.score.low, self.score.high + 1)})
+
+    def sorted_array(self) -> Dict[Tuple[int, ...], Fraction]:
+        """
+        Distribution of the whole sorted array of scores, worked out the first time it's asked for.
+        :return: Probability of each ascending tuple of scores.
+        """
+        if self._sorted is None:
+            self._sorted = {}
+            values = list(self.score.probabilities)
+            for scores in combinations_with_replacement(values, self.abilities):
+                orderings = factorial(self.abilities)
+                p = Fraction(1)
+                for value in set(scores):
+                    orderings //= factorial(scores.count(value))
+                    p *= self.score[value] ** scores.count(value)
+                self._sorted[scores] = orderings * p
+        return self._sorted
+
+
+@lru_cache(maxsize=None)
+def engine(scheme: DiceScheme = FOUR_D6_DROP_LOWEST, abilities: int = 6) -> ProbabilityEngine:
+    """
+    Gets the shared engine for a scheme, building its tables the first time.
+    :param DiceScheme scheme: How each ability score is rolled.
+    :param int abilities: How many ability scores a character has.
+    :return: ProbabilityEngine
+    """
+    return ProbabilityEngine(scheme, abilities)
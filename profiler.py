@@ -0,0 +1,144 @@
+from contextlib import nullcontext
+from functools import wraps
+from time import perf_counter
+from typing import *
+import json
+
+import numpy
+
+PHASES = ("frame", "events", "hover", "text", "blit", "present")
+
+
+class Span:
+    def __init__(self, profiler, phase: int):
+        self.profiler = profiler
+        self.phase = phase
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.phase, self.start, perf_counter() - self.start)
+
+
+class Profiler:
+    def __init__(self, capacity: int = 1 << 16):
+        """
+        Times the phases of each frame into a ring buffer, keeping the last capacity spans. Does nothing but check
+        enabled until it's switched on.
+        :param int capacity: The most spans kept.
+        """
+        self.enabled = False
+        self.overlay = False  # whether Main draws the last frame's phase times on the screen
+        self.capacity = capacity
+        self.phases = numpy.zeros(capacity, dtype=numpy.uint8)
+        self.frames = numpy.zeros(capacity, dtype=numpy.uint32)
+        self.starts = numpy.zeros(capacity, dtype=numpy.float64)
+        self.durations = numpy.zeros(capacity, dtype=numpy.float64)
+        self.written = 0  # spans recorded ever, the next one goes at written % capacity
+        self.frame = 0
+        self.last_frame = [0.0] * len(PHASES)  # seconds spent in each phase during the last complete frame
+        self.current = [0.0] * len(PHASES)
+
+    def record(self, phase: int, start: float, duration: float) -> None:
+        """
+        Stores one span.
+        :param int phase: Index into PHASES.
+        :param float start: perf_counter() when it began.
+        :param float duration: Seconds it took.
+        :return: None
+        """
+        index = self.written % self.capacity
+        self.phases[index] = phase
+        self.frames[index] = self.frame
+        self.starts[index] = start
+        self.durations[index] = duration
+        self.written += 1
+        self.current[phase] += duration
+        if phase == 0:  # the frame span closes last, so the frame is over
+            self.last_frame = self.current
+            self.current = [0.0] * len(PHASES)
+            self.frame += 1
+
+    def phase(self, name: str):
+        """
+        A with block to time as one phase, ie with profiler.phase("frame"): ...
+        :param str name: One of PHASES.
+        :return: A context manager.
+        """
+        if not self.enabled:
+            return nullcontext()
+        return Span(self, PHASES.index(name))
+
+    def timed(self, name: str) -> Callable:
+        """
+        Decorates a function, so each call is timed as one phase.
+        :param str name: One of PHASES.
+        :return: The decorator.
+        """
+        phase = PHASES.index(name)
+
+        def decorate(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(phase, start, perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def spans(self) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        The spans still in the buffer, oldest first.
+        :return: phases, frames, starts, durations
+        """
+        count = min(self.written, self.capacity)
+        order = (numpy.arange(count) + self.written - count) % self.capacity
+        return self.phases[order], self.frames[order], self.starts[order], self.durations[order]
+
+    def chrome_trace(self, path: str) -> None:
+        """
+        Writes the buffer as Chrome trace event JSON, which chrome://tracing and Perfetto can open.
+        :param str path: Where to write it.
+        :return: None
+        """
+        phases, frames, starts, durations = self.spans()
+        events = [{"name": PHASES[phase], "ph": "X", "pid": 1, "tid": 1, "ts": start * 1e6, "dur": duration * 1e6,
+                   "args": {"frame": int(frame)}}
+                  for phase, frame, start, duration in zip(phases.tolist(), frames.tolist(), starts.tolist(),
+                                                           durations.tolist())]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def summary(self) -> str:
+        """
+        Mean, p95 and max milliseconds per frame spent in each phase, over the frames in the buffer. Phases nest, ie
+        blits happen inside hover, so the columns don't add up to the frame time.
+        :return: str
+        """
+        phases, frames, starts, durations = self.spans()
+        complete = frames < self.frame
+        if not complete.any():
+            return "no frames recorded"
+        first = frames[complete].min()
+        # frames at the start of the buffer may have lost spans to the ring wrapping, so skip the oldest one.
+        keep = complete & (frames > first) if self.written > self.capacity else complete
+        frame_ids = frames[keep] - frames[keep].min()
+        count = frame_ids.max() + 1
+        totals = numpy.zeros((count, len(PHASES)))
+        numpy.add.at(totals, (frame_ids, phases[keep]), durations[keep] * 1000)
+
+        lines = [f"{'phase':>8} {'mean ms':>8} {'p95 ms':>8} {'max ms':>8}   over {count} frames"]
+        for index, name in enumerate(PHASES):
+            lines.append(f"{name:>8} {totals[:, index].mean():>8.3f} {numpy.percentile(totals[:, index], 95):>8.3f} "
+                         f"{totals[:, index].max():>8.3f}")
+        return "\n".join(lines)
+
+
+profiler = Profiler()  # shared by everything that gets timed
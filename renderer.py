@@ -0,0 +1,88 @@
+from pygame.locals import *
+from typing import *
+import pygame
+
+from profiler import profiler
+
+
+class Renderer:
+    def __init__(self):
+        """
+        Collects the parts of the screen drawn to during a frame, and pushes them to the display in one go at the end
+        of it, rather than updating the display after every draw.
+        """
+        self.dirty = []
+        self.frames = 0
+        self.last_rects = 0  # rects pushed by the last flush
+        self.last_pixels = 0  # pixels pushed by the last flush
+        self.total_rects = 0
+        self.total_pixels = 0
+        self.marked = 0  # rects marked over every frame, before merging
+        self.blits = 0  # blits made through blit(), over every frame
+        self.updates = 0  # calls made to pygame.display.update
+
+    def mark(self, rect) -> None:
+        """
+        Marks part of the screen as changed.
+        :param rect: Anything pygame accepts as a rect.
+        :return: None
+        """
+        self.dirty.append(Rect(rect))
+        self.marked += 1
+
+    @profiler.timed("blit")
+    def blit(self, surface: pygame.Surface, image: pygame.Surface, coord) -> Rect:
+        """
+        Blits an image onto a surface, counting it.
+        :param pygame.Surface surface: The surface to draw onto, ie the screen.
+        :param pygame.Surface image: The image to draw.
+        :param coord: The top left corner to draw it at.
+        :return: The rect drawn to.
+        """
+        self.blits += 1
+        return surface.blit(image, coord)
+
+    @staticmethod
+    def merge(rects: List[Rect]) -> List[Rect]:
+        """
+        Joins rects that overlap or touch into their union, until none of them do.
+        :param List[Rect] rects: The rects to merge.
+        :return: List[Rect]
+        """
+        merged = []
+        for rect in rects:
+            rect = Rect(rect)
+            index = 0
+            while index < len(merged):
+                if rect.colliderect(merged[index].inflate(2, 2)):  # inflated, so rects sharing an edge count
+                    rect.union_ip(merged.pop(index))
+                    index = 0  # the union may now reach rects already passed over
+                else:
+                    index += 1
+            merged.append(rect)
+        return merged
+
+    @profiler.timed("present")
+    def flush(self) -> None:
+        """
+        Pushes everything marked this frame to the display.
+        :return: None
+        """
+        screen = pygame.display.get_surface()
+        rects = self.merge(self.dirty)
+        if screen is not None:
+            rects = [rect.clip(screen.get_rect()) for rect in rects]
+            rects = [rect for rect in rects if rect.width and rect.height]
+        self.dirty.clear()
+
+        if rects:
+            pygame.display.update(rects)
+            self.updates += 1
+        self.frames += 1
+        self.last_rects = len(rects)
+        self.last_pixels = sum(rect.width * rect.height for rect in rects)
+        self.total_rects += self.last_rects
+        self.total_pixels += self.last_pixels
+
+
+renderer = Renderer()  # the one everything on the screen is drawn through
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import *
+
+from character import CLASSES, RACES, StatsGenerator
+
+if TYPE_CHECKING:
+    import numpy
+
+
+class RaceRule(NamedTuple):
+    increases: Dict[str, int]  # ability -> fixed increase
+    choices: int = 0  # how many other abilities of the player's choice also increase
+    choice_amount: int = 0  # how much each chosen ability increases by
+
+
+class ClassRule(NamedTuple):
+    # the scores needed to take the class, any one alternative will do, ie a Fighter needs Strength or Dexterity.
+    minimums: Tuple[Dict[str, int], ...]
+    # every ability, most important to the class first, which is where auto-assigning puts the best scores.
+    priorities: Tuple[str, ...]
+
+
+# the traits given in character.RACE_DESCRIPTIONS.
+RACE_RULES = {
+    "Dragonborn": RaceRule({"Strength": 2, "Charisma": 1}),
+    "Dwarf": RaceRule({"Constitution": 2}),
+    "Elf": RaceRule({"Dexterity": 2}),
+    "Gnome": RaceRule({"Intelligence": 2}),
+    "Half-elf": RaceRule({"Charisma": 2}, choices=2, choice_amount=1),
+    "Half-orc": RaceRule({"Strength": 2, "Constitution": 1}),
+    "Halfling": RaceRule({"Dexterity": 2}),
+    "Human": RaceRule({ability: 1 for ability in StatsGenerator.ABILITIES}),
+    "Tiefling": RaceRule({"Charisma": 2, "Intelligence": 1}),
+}
+
+CLASS_RULES = {
+    "Barbarian": ClassRule(({"Strength": 13},),
+                           ("Strength", "Constitution", "Dexterity", "Wisdom", "Charisma", "Intelligence")),
+    "Bard": ClassRule(({"Charisma": 13},),
+                      ("Charisma", "Dexterity", "Constitution", "Wisdom", "Intelligence", "Strength")),
+    "Cleric": ClassRule(({"Wisdom": 13},),
+                        ("Wisdom", "Constitution", "Strength", "Charisma", "Dexterity", "Intelligence")),
+    "Druid": ClassRule(({"Wisdom": 13},),
+                       ("Wisdom", "Constitution", "Dexterity", "Intelligence", "Charisma", "Strength")),
+    "Fighter": ClassRule(({"Strength": 13}, {"Dexterity": 13}),
+                         ("Strength", "Constitution", "Dexterity", "Wisdom", "Charisma", "Intelligence")),
+    "Monk": ClassRule(({"Dexterity": 13, "Wisdom": 13},),
+                      ("Dexterity", "Wisdom", "Constitution", "Strength", "Intelligence", "Charisma")),
+    "Paladin": ClassRule(({"Strength": 13, "Charisma": 13},),
+                         ("Strength", "Charisma", "Constitution", "Wisdom", "Dexterity", "Intelligence")),
+    "Ranger": ClassRule(({"Dexterity": 13, "Wisdom": 13},),
+                        ("Dexterity", "Wisdom", "Constitution", "Strength", "Intelligence", "Charisma")),
+    "Rogue": ClassRule(({"Dexterity": 13},),
+                       ("Dexterity", "Constitution", "Intelligence", "Wisdom", "Charisma", "Strength")),
+    "Sorcerer": ClassRule(({"Charisma": 13},),
+                          ("Charisma", "Constitution", "Dexterity", "Wisdom", "Intelligence", "Strength")),
+    "Warlock": ClassRule(({"Charisma": 13},),
+                         ("Charisma", "Constitution", "Dexterity", "Wisdom", "Intelligence", "Strength")),
+    "Wizard": ClassRule(({"Intelligence": 13},),
+                        ("Intelligence", "Constitution", "Dexterity", "Wisdom", "Charisma", "Strength")),
+}
+
+
+class CompiledRaces(NamedTuple):
+    bonuses: numpy.ndarray  # (races, 6) fixed increases, rows in RACES order, columns in ABILITIES order
+    choices: numpy.ndarray  # (races,) how many abilities of choice increase
+    choice_amounts: numpy.ndarray  # (races,) how much each chosen ability increases
+    choosable: numpy.ndarray  # (races, 6) which abilities can be chosen, those without a fixed increase
+
+
+class CompiledClasses(NamedTuple):
+    minimums: numpy.ndarray  # (classes, alternatives, 6), 0 where there's no minimum, 255 for unused alternatives
+    weights: numpy.ndarray  # (classes, 6) how much each ability matters to the class, 6 for the most, 1 for the least
+
+
+@lru_cache(maxsize=None)
+def compile_races() -> CompiledRaces:
+    """
+    Turns RACE_RULES into dense arrays that can be indexed by race code.
+    :return: CompiledRaces
+    """
+    import numpy
+
+    abilities = StatsGenerator.ABILITIES
+    bonuses = numpy.zeros((len(RACES), len(abilities)), dtype=numpy.int16)
+    choices = numpy.zeros(len(RACES), dtype=numpy.int16)
+    choice_amounts = numpy.zeros(len(RACES), dtype=numpy.int16)
+    for race_code, race in enumerate(RACES):
+        rule = RACE_RULES[race]
+        for ability, amount in rule.increases.items():
+            bonuses[race_code, abilities.index(ability)] = amount
+        choices[race_code] = rule.choices
+        choice_amounts[race_code] = rule.choice_amount
+    return CompiledRaces(bonuses, choices, choice_amounts, bonuses == 0)
+
+
+@lru_cache(maxsize=None)
+def compile_classes() -> CompiledClasses:
+    """
+    Turns CLASS_RULES into a dense array that can be indexed by class code.
+    :return: CompiledClasses
+    """
+    import numpy
+
+    abilities = StatsGenerator.ABILITIES
+    alternatives = max(len(CLASS_RULES[dnd_class].minimums) for dnd_class in CLASSES)
+    minimums = numpy.full((len(CLASSES), alternatives, len(abilities)), 255, dtype=numpy.uint8)
+    weights = numpy.zeros((len(CLASSES), len(abilities)), dtype=numpy.int16)
+    for class_code, dnd_class in enumerate(CLASSES):
+        rule = CLASS_RULES[dnd_class]
+        for alternative, scores in enumerate(rule.minimums):
+            minimums[class_code, alternative] = 0
+            for ability, score in scores.items():
+                minimums[class_code, alternative, abilities.index(ability)] = score
+        for rank, ability in enumerate(rule.priorities):
+            weights[class_code, abilities.index(ability)] = len(abilities) - rank
+    return CompiledClasses(minimums, weights)
+
+
+def apply_racial_bonuses(stats: numpy.ndarray, races: numpy.ndarray, preference: Optional[numpy.ndarray] = None) \
+        -> numpy.ndarray:
+    """
+    Adds each character's racial increases to their scores, for a whole batch at once. Increases of choice go to the
+    abilities the preference ranks highest.
+    :param numpy.ndarray stats: (n, 6) scores, columns in StatsGenerator.ABILITIES order.
+    :param numpy.ndarray races: (n,) race codes, indices into RACES.
+    :param numpy.ndarray preference: (n, 6) how much each character wants each ability increased, higher first. The
+    scores themselves if not given, so the best abilities get better.
+    :return: (n, 6) scores with the increases, as uint8.
+    """
+    import numpy
+
+    stats, races = numpy.asarray(stats), numpy.asarray(races)
+    compiled = compile_races()
+    result = stats.astype(numpy.int16) + compiled.bonuses[races]
+
+    most_choices = int(compiled.choices.max())
+    if most_choices:
+        if preference is None:
+            preference = stats
+        # abilities that can't be chosen go last, then take the first few columns of each row's ranking.
+        ranked = numpy.where(compiled.choosable[races], preference.astype(numpy.int64), -(1 << 40))
+        order = numpy.argsort(-ranked, axis=1, kind="stable")[:, :most_choices]
+        wanted = numpy.arange(most_choices)[None, :] < compiled.choices[races][:, None]
+        rows = numpy.broadcast_to(numpy.arange(len(stats))[:, None], order.shape)
+        # each row chooses different abilities, so no (row, ability) pair repeats and += is safe.
+        result[rows[wanted], order[wanted]] += numpy.broadcast_to(compiled.choice_amounts[races][:, None],
+                                                                   order.shape)[wanted]
+    return result.astype(numpy.uint8)
+
+
+def meets_minimums(stats: numpy.ndarray, classes: numpy.ndarray) -> numpy.ndarray:
+    """
+    Whether each character has the scores their class needs.
+    :param numpy.ndarray stats: (n, 6) scores, columns in StatsGenerator.ABILITIES order.
+    :param numpy.ndarray classes: (n,) class codes, indices into CLASSES.
+    :return: (n,) bool
+    """
+    import numpy
+
+    stats = numpy.asarray(stats)
+    minimums = compile_classes().minimums[classes]  # (n, alternatives, 6)
+    return (stats[:, None, :] >= minimums).all(axis=2).any(axis=1)
+
+
+def assign_scores(stats: numpy.ndarray, races: numpy.ndarray, classes: numpy.ndarray, chunk_size: int = 1 << 16) \
+        -> numpy.ndarray:
+    """
+    Rearranges each character's rolled scores between their abilities, to get the best modifiers where their class
+    needs them most, counting racial increases. The value of an arrangement is the sum of each ability's class weight
+    times its modifier, with ties going to the arrangement that puts the higher scores in the more important abilities.
+    Increases of choice go to the class's most important abilities.
+    :param numpy.ndarray stats: (n, 6) rolled scores, in any order.
+    :param numpy.ndarray races: (n,) race codes, indices into RACES.
+    :param numpy.ndarray classes: (n,) class codes, indices into CLASSES.
+    :param int chunk_size: How many characters to solve at once, which bounds the memory used.
+    :return: (n, 6) the same scores per row, rearranged into StatsGenerator.ABILITIES order, without the increases.
+    """
+    import numpy
+
+    # the order scores were rolled in doesn't matter, so characters with the same scores, race and class share an
+    # answer, and only one of each is solved.
+    stats = numpy.sort(numpy.asarray(stats, dtype=numpy.uint8), axis=1)
+    key = stats.astype(numpy.int64) @ (1 << (5 * numpy.arange(stats.shape[1], dtype=numpy.int64)))
+    key = (key * len(RACES) + races) * len(CLASSES) + classes
+    key, first, inverse = numpy.unique(key, return_index=True, return_inverse=True)
+    stats, races, classes = stats[first], numpy.asarray(races)[first], numpy.asarray(classes)[first]
+
+    result = numpy.empty_like(stats)
+    for start in range(0, len(stats), chunk_size):
+        end = start + chunk_size
+        result[start:end] = _assign_chunk(stats[start:end], races[start:end], classes[start:end])
+    return result[inverse.reshape(-1)]
+
+
+def _assign_chunk(stats: numpy.ndarray, races: numpy.ndarray, classes: numpy.ndarray) -> numpy.ndarray:
+    """
+    assign_scores() for one chunk. Picking the score for each ability in turn, the best value of every set of scores
+    used so far only depends on which scores they are, so 64 subsets are solved instead of 720 arrangements.
+    :param numpy.ndarray stats: (n, 6) rolled scores.
+    :param numpy.ndarray races: (n,) race codes.
+    :param numpy.ndarray classes: (n,) class codes.
+    :return: (n, 6) rearranged scores.
+    """
+    import numpy
+
+    count, abilities = stats.shape
+    weights = compile_classes().weights[classes].astype(numpy.int32)  # (n, abilities)
+    increases = apply_racial_bonuses(numpy.zeros_like(stats), races, weights).astype(numpy.int32)
+    scores = stats.astype(numpy.int32)
+
+    # gain[ability, slot] is the value of giving an ability the score in that slot, for every row. the total of weights
+    # times scores is at most 21 * 20, so scaling the modifiers by 1024 means a better modifier always wins over a tie
+    # break. rows are along the last axis, so each step below works on contiguous arrays.
+    final = (scores[:, None, :] + increases[:, :, None]).transpose(1, 2, 0)
+    gain = weights.T[:, None, :] * ((final // 2 - 5) * 1024 + final)
+
+    subsets = 1 << abilities
+    best = numpy.empty((subsets, count), dtype=numpy.int32)
+    best[0] = 0
+    last = numpy.empty((subsets, count), dtype=numpy.uint8)  # the slot given to the latest ability of each subset
+    for subset in range(1, subsets):
+        ability = bin(subset).count("1") - 1  # abilities take their scores in order, so this one is next
+        slots = [slot for slot in range(abilities) if subset >> slot & 1]
+        value = best[subset ^ (1 << slots[0])] + gain[ability, slots[0]]
+        chosen = numpy.full(count, slots[0], dtype=numpy.uint8)
+        for slot in slots[1:]:
+            option = best[subset ^ (1 << slot)] + gain[ability, slot]
+            better = option > value
+            numpy.maximum(value, option, out=value)
+            numpy.copyto(chosen, slot, where=better)
+        best[subset] = value
+        last[subset] = chosen
+
+    # walk back from the subset of every score to find each ability's slot.
+    rows = numpy.arange(count)
+    subset = numpy.full(count, subsets - 1)
+    result = numpy.empty_like(stats)
+    for ability in reversed(range(abilities)):
+        slot = last[subset, rows]
+        result[:, ability] = stats[rows, slot]
+        subset = subset ^ (1 << slot.astype(subset.dtype))
+    return result
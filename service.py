@@ -0,0 +1,365 @@
+"""
+A local HTTP service that generates characters for other tools, without opening a window.
+Usage: python service.py --port 8765
+    GET /roll?count=1                          ability scores only
+    GET /character?seed=42&id=7                one character, the same every time for a seed and id
+    GET /character                             one new character
+    GET /party?size=4                          several new characters
+    GET /bulk?count=100000&seed=42             many characters as JSON lines, generated in worker processes and
+                                               streamed a chunk at a time
+Add racial_bonuses=1 or auto_assign=1 to any of them to apply rules.py. New characters come from the service's seed,
+and each response says which seed and ids they were, so any of them can be asked for again.
+
+Requests for new characters that arrive close together are answered from one generate_chunk() call, which costs much
+the same for one character as for hundreds.
+"""
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import *
+from urllib.parse import parse_qs, urlsplit
+import asyncio
+import json
+import os
+
+from character import MAX_CHARACTER, CharacterBatch, StatsGenerator
+from generate import CHUNK_SIZE, generate_chunk, records, render_chunk
+
+HOST = "127.0.0.1"
+PORT = 8765
+WINDOW = 0.002  # how long a request waits for others to share its batch, in seconds
+MAX_BATCH = 4096  # a batch is generated as soon as it has this many characters
+MAX_PARTY = 64  # the most characters /roll and /party give at once
+MAX_BULK = 10_000_000  # the most characters /bulk gives at once
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        """
+        Stops handling a request, and answers it with an error.
+        :param int status: The HTTP status code.
+        :param str message: What went wrong, sent back as {"error": message}.
+        """
+        super().__init__(message)
+        self.status = status
+
+
+class Batcher:
+    def __init__(self, seed: int, window: float, racial_bonuses: bool = False, auto_assign: bool = False):
+        """
+        Collects requests for new characters, and generates them together once window has passed since the first one,
+        or MAX_BATCH characters are waiting. Characters are numbered on from the last batch, so no two requests get
+        the same ones.
+        :param int seed: The seed every character comes from.
+        :param float window: Seconds to wait for more requests, 0 to generate each request on its own straight away.
+        :param bool racial_bonuses: Whether to add each race's ability increases.
+        :param bool auto_assign: Whether to rearrange scores to suit each class.
+        """
+        self.seed = seed
+        self.window = window
+        self.racial_bonuses = racial_bonuses
+        self.auto_assign = auto_assign
+        self.waiting = []  # (count, future) per request in the next batch
+        self.rows = 0  # the characters the waiting requests want altogether
+        self.timer = None  # the asyncio.TimerHandle that will generate the next batch
+        self.next_id = 0
+        self.batches = 0
+        self.requests = 0
+
+    def request(self, count: int) -> asyncio.Future:
+        """
+        Asks for new characters.
+        :param int count: How many.
+        :return: A future of a CharacterBatch of them.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.append((count, future))
+        self.rows += count
+        if not self.window or self.rows >= MAX_BATCH:
+            self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        return future
+
+    def flush(self) -> None:
+        """
+        Generates every waiting request's characters in one go, and hands each request its share.
+        :return: None
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        waiting, self.waiting, rows, self.rows = self.waiting, [], self.rows, 0
+        chunk = generate_chunk(self.seed, self.next_id, rows, self.racial_bonuses, self.auto_assign)
+        self.next_id += rows
+        self.batches += 1
+        self.requests += len(waiting)
+
+        offset = 0
+        for count, future in waiting:
+            share = slice(offset, offset + count)
+            if not future.cancelled():
+                future.set_result(CharacterBatch(chunk.start + offset, chunk.races[share], chunk.classes[share],
+                                                 chunk.stats[share]))
+            offset += count
+
+
+def number(query: Dict[str, List[str]], name: str, default: Optional[int], low: int, high: int) -> Optional[int]:
+    """
+    Reads a whole number from the query string.
+    :param Dict[str, List[str]] query: The output of parse_qs.
+    :param str name: The parameter.
+    :param int default: Used if it isn't given.
+    :param int low: The lowest allowed.
+    :param int high: The highest allowed.
+    :return: int, or default.
+    """
+    if name not in query:
+        return default
+    try:
+        value = int(query[name][-1])
+    except ValueError:
+        raise HTTPError(400, f"{name} must be a whole number")
+    if not low <= value <= high:
+        raise HTTPError(400, f"{name} must be from {low} to {high}")
+    return value
+
+
+def flags(query: Dict[str, List[str]]) -> Tuple[bool, bool]:
+    """
+    Reads which rules to apply from the query string.
+    :param Dict[str, List[str]] query: The output of parse_qs.
+    :return: racial_bonuses, auto_assign
+    """
+    return tuple(query.get(name, ["0"])[-1].lower() in ("1", "true", "yes") for name in ("racial_bonuses",
+                                                                                          "auto_assign"))
+
+
+class Service:
+    def __init__(self, seed: Optional[int] = None, window: float = WINDOW, workers: int = 1):
+        """
+        The request handlers, with a Batcher for each combination of rules and a process pool for bulk requests.
+        :param int seed: The seed new characters come from, a random one if not given.
+        :param float window: See Batcher.
+        :param int workers: Processes for bulk requests.
+        """
+        self.seed = int.from_bytes(os.urandom(8), "little") >> 2 if seed is None else seed
+        self.window = window
+        self.workers = workers
+        self.pool = None  # made on the first bulk request, as most uses never need it
+        self.batchers = {}  # (racial_bonuses, auto_assign) -> Batcher
+        self.routes = {"/roll": self.roll, "/character": self.character, "/party": self.party, "/bulk": self.bulk,
+                       "/status": self.status}
+
+    def batcher(self, query: Dict[str, List[str]]) -> Batcher:
+        """
+        Gets the Batcher for the rules a request asks for. Each has its own ids, so they're kept apart by seed.
+        :param Dict[str, List[str]] query: The output of parse_qs.
+        :return: Batcher
+        """
+        key = flags(query)
+        if key not in self.batchers:
+            self.batchers[key] = Batcher(self.seed + 2 * key[0] + key[1], self.window, *key)
+        return self.batchers[key]
+
+    async def roll(self, query: Dict[str, List[str]]) -> Tuple[str, bytes]:
+        """
+        /roll?count=n, ability scores without a race or class.
+        :param Dict[str, List[str]] query: The output of parse_qs.
+        :return: The content type, and the body.
+        """
+        batch = await self.batcher(query).request(number(query, "count", 1, 1, MAX_PARTY))
+        return self.json({"abilities": StatsGenerator.ABILITIES, "rolls": batch.stats.tolist()})
+
+    async def character(self, query: Dict[str, List[str]]) -> Tuple[str, bytes]:
+        """
+        /character?seed=s&id=k for a known character, or /character for a new one.
+        :param Dict[str, List[str]] query: The output of parse_qs.
+        :return: The content type, and the body.
+        """
+        seed = number(query, "seed", None, 0, 2 ** 63 - 1)
+        if seed is None:
+            batcher = self.batcher(query)
+            batch = await batcher.request(1)
+            seed = batcher.seed
+        else:
+            # a known character doesn't take any new ids, so it's made on its own.
+            batch = generate_chunk(seed, number(query, "id", 0, 0, MAX_CHARACTER), 1, *flags(query))
+        return self.json({"seed": seed, **next(records(batch))})
+
+    async def party(self, query: Dict[str, List[str]]) -> Tuple[str, bytes]:
+        """
+        /party?size=n, several new characters.
+        :param Dict[str, List[str]] query: The output of parse_qs.
+        :return: The content type, and the body.
+        """
+        batcher = self.batcher(query)
+        batch = await batcher.request(number(query, "size", 4, 1, MAX_PARTY))
+        return self.json({"seed": batcher.seed, "characters": list(records(batch))})
+
+    async def bulk(self, query: Dict[str, List[str]]) -> Tuple[str, AsyncIterator[bytes]]:
+        """
+        /bulk?count=n&seed=s&first=k, characters k to k + n - 1 of a seed as JSON lines, like generate.py gives.
+        :param Dict[str, List[str]] query: The output of parse_qs.
+        :return: The content type, and the body a chunk at a time.
+        """
+        count = number(query, "count", None, 1, MAX_BULK)
+        if count is None:
+            raise HTTPError(400, "count is needed")
+        seed = number(query, "seed", self.seed, 0, 2 ** 63 - 1)
+        first = number(query, "first", 0, 0, MAX_CHARACTER - count + 1)
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers)
+        return "application/x-ndjson", self.stream(seed, first, count, flags(query))
+
+    async def stream(self, seed: int, first: int, count: int, rules: Tuple[bool, bool]) -> AsyncIterator[bytes]:
+        """
+        Generates characters in the pool, so other requests are still answered meanwhile, and gives them back in id
+        order. Like generate.pipeline(), only a couple of chunks per worker are in flight at once, and the next chunk
+        isn't asked for until the client has taken the last, so memory stays the same however many are asked for.
+        :param int seed: The seed.
+        :param int first: The id of the first character.
+        :param int count: The number of characters.
+        :param Tuple[bool, bool] rules: racial_bonuses, auto_assign.
+        :return: Each chunk's JSON lines.
+        """
+        loop = asyncio.get_running_loop()
+        pending = deque()
+        try:
+            for start in range(first, first + count, CHUNK_SIZE):
+                pending.append(loop.run_in_executor(self.pool, render_chunk, "jsonl", seed, start,
+                                                    min(CHUNK_SIZE, first + count - start), *rules))
+                if len(pending) >= self.workers * 2:
+                    yield (await pending.popleft())[1].encode()
+            while pending:
+                yield (await pending.popleft())[1].encode()
+        finally:
+            for job in pending:  # the client went away, so the rest aren't needed
+                job.cancel()
+
+    async def status(self, query: Dict[str, List[str]]) -> Tuple[str, bytes]:
+        """
+        /status, the seed and how well requests are being batched.
+        :param Dict[str, List[str]] query: The output of parse_qs.
+        :return: The content type, and the body.
+        """
+        return self.json({"seed": self.seed, "window": self.window, "batchers": [
+            {"racial_bonuses": key[0], "auto_assign": key[1], "requests": batcher.requests,
+             "batches": batcher.batches, "characters": batcher.next_id} for key, batcher in self.batchers.items()]})
+
+    @staticmethod
+    def json(body: Any) -> Tuple[str, bytes]:
+        """
+        Encodes a response body as JSON.
+        :param Any body: The body.
+        :return: The content type, and the body.
+        """
+        return "application/json", json.dumps(body).encode()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Answers the requests on one connection, one after another, until the client closes it or asks to.
+        :param asyncio.StreamReader reader: The connection's input.
+        :param asyncio.StreamWriter writer: The connection's output.
+        :return: None
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                    headers = {}
+                    for line in header_lines:
+                        if ":" in line:
+                            name, value = line.split(":", 1)
+                            headers[name.strip().lower()] = value.strip()
+                    if "content-length" in headers:
+                        await reader.readexactly(int(headers["content-length"]))  # bodies aren't used
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+                    return  # the client has gone, or sent something that can't be answered
+
+                try:
+                    method, target, version = request_line.split(" ")
+                    url = urlsplit(target)
+                    if url.path not in self.routes:
+                        raise HTTPError(404, f"no such endpoint {url.path}")
+                    if method != "GET":
+                        raise HTTPError(405, "only GET is supported")
+                    status, (content_type, body) = 200, await self.routes[url.path](parse_qs(url.query))
+                except HTTPError as error:
+                    status, (content_type, body) = error.status, self.json({"error": str(error)})
+                except ValueError:
+                    version = "HTTP/1.0"
+                    status, (content_type, body) = 400, self.json({"error": "malformed request"})
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                if isinstance(body, bytes):
+                    framing = f"Content-Length: {len(body)}\r\n"
+                else:
+                    # streamed bodies are sent in chunked encoding, or, to an HTTP/1.0 client, ended by closing.
+                    framing = "Transfer-Encoding: chunked\r\n" if version == "HTTP/1.1" else ""
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n{framing}"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode())
+                if isinstance(body, bytes):
+                    writer.write(body)
+                    await writer.drain()
+                elif not await self.send_stream(writer, body, chunked=bool(framing)):
+                    return
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def send_stream(writer: asyncio.StreamWriter, body: AsyncIterator[bytes], chunked: bool) -> bool:
+        """
+        Sends a streamed body, waiting for each piece to be taken by the client before making the next.
+        :param asyncio.StreamWriter writer: The connection's output.
+        :param AsyncIterator[bytes] body: The pieces.
+        :param bool chunked: Whether to send them in chunked encoding.
+        :return: False if the client went away part way through.
+        """
+        try:
+            async for piece in body:
+                writer.write(b"%x\r\n%s\r\n" % (len(piece), piece) if chunked else piece)
+                await writer.drain()
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except ConnectionError:
+            return False
+        finally:
+            await body.aclose()
+        return True
+
+    async def serve(self, host: str = HOST, port: int = PORT) -> None:
+        """
+        Answers requests until cancelled.
+        :param str host: The address to listen on, localhost by default so only this machine can connect.
+        :param int port: The port to listen on.
+        :return: None
+        """
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"serving on http://{host}:{port} with seed {self.seed}", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Serve generated characters over HTTP.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--seed", type=int, help="where new characters come from, random if not given")
+    parser.add_argument("--window", type=float, default=WINDOW,
+                        help="seconds a request waits for others to share its batch, 0 to not batch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for /bulk")
+    args = parser.parse_args()
+    try:
+        asyncio.run(Service(args.seed, args.window, args.workers).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,199 @@
+"""
+Keeps generated characters in one file that's memory mapped rather than read, so it opens instantly however many
+characters it holds, and only the pages a query touches are read from disk.
+
+The file is a header, then these sections, each one starting on a 64 byte boundary, all uint8:
+    races       (count,)                        index into RACES per character
+    classes     (count,)                        index into CLASSES per character
+    stats       (count, abilities)              scores, columns in StatsGenerator.ABILITIES order
+    race_index  (races, bytes)                  a bitmap per race, bit i set if character i is that race
+    class_index (classes, bytes)                a bitmap per class
+    stat_index  (abilities, thresholds, bytes)  a bitmap per ability and threshold, bit i set if its score is at least
+                                                the threshold
+Bitmaps take one bit per character, so a query reads 1/8 of a byte per character per condition, and conditions are
+combined by and-ing bitmaps.
+"""
+from typing import *
+import os
+import struct
+
+import numpy
+
+from character import CLASSES, RACES, Character, CharacterBatch, StatsGenerator
+
+MAGIC = b"DNDCHAR1"
+HEADER = struct.Struct("<8sQQBBBB")  # magic, count, id of the first character, races, classes, abilities, thresholds
+THRESHOLDS = range(1, 21)  # the scores with a bitmap, enough for any roll with its racial increases
+ALIGN = 64
+BLOCK = 1 << 20  # characters indexed at once, a multiple of 8 so each block starts on a whole byte of the bitmaps
+
+
+def layout(count: int) -> Dict[str, Tuple[int, Tuple[int, ...]]]:
+    """
+    Where each section of a file of count characters is.
+    :param int count: The number of characters.
+    :return: section name -> (offset, shape), plus "end" -> (file size, ()).
+    """
+    bitmap = (count + 7) // 8
+    shapes = {"races": (count,), "classes": (count,), "stats": (count, len(StatsGenerator.ABILITIES)),
+              "race_index": (len(RACES), bitmap), "class_index": (len(CLASSES), bitmap),
+              "stat_index": (len(StatsGenerator.ABILITIES), len(THRESHOLDS), bitmap)}
+    sections = {}
+    offset = HEADER.size
+    for name, shape in shapes.items():
+        offset = -(-offset // ALIGN) * ALIGN
+        sections[name] = (offset, shape)
+        offset += int(numpy.prod(shape))
+    sections["end"] = (offset, ())
+    return sections
+
+
+def write_store(path: str, batches: Iterable[CharacterBatch], count: int, first: int = 0) -> int:
+    """
+    Writes characters to a store file, then builds its indexes. The file is written under another name and only moved
+    into place once it's complete, so a reader never sees half of one.
+    :param str path: Where to write it.
+    :param Iterable[CharacterBatch] batches: The characters in id order, a batch at a time, ie from generate.pipeline().
+    :param int count: The number of characters the batches hold altogether.
+    :param int first: The id of the first character.
+    :return: The number of characters written.
+    """
+    sections = layout(count)
+    temp = path + ".tmp"
+    with open(temp, "wb") as file:
+        file.write(HEADER.pack(MAGIC, count, first, len(RACES), len(CLASSES), len(StatsGenerator.ABILITIES),
+                               len(THRESHOLDS)))
+        file.truncate(sections["end"][0])
+
+    columns = {name: numpy.memmap(temp, numpy.uint8, "r+", offset, shape) if count else numpy.zeros(shape, numpy.uint8)
+               for name, (offset, shape) in sections.items() if name != "end"}
+    written = 0
+    for batch in batches:
+        end = written + len(batch.races)
+        if end > count:
+            raise ValueError(f"more than the {count} characters expected")
+        columns["races"][written:end] = batch.races
+        columns["classes"][written:end] = batch.classes
+        columns["stats"][written:end] = batch.stats
+        written = end
+    if written != count:
+        raise ValueError(f"{written} characters written, {count} expected")
+
+    for start in range(0, count, BLOCK):
+        end = min(start + BLOCK, count)
+        bitmap = slice(start // 8, (end + 7) // 8)
+        races, classes, stats = columns["races"][start:end], columns["classes"][start:end], columns["stats"][start:end]
+        for race in range(len(RACES)):
+            columns["race_index"][race, bitmap] = numpy.packbits(races == race)
+        for dnd_class in range(len(CLASSES)):
+            columns["class_index"][dnd_class, bitmap] = numpy.packbits(classes == dnd_class)
+        for ability in range(len(StatsGenerator.ABILITIES)):
+            for row, threshold in enumerate(THRESHOLDS):
+                columns["stat_index"][ability, row, bitmap] = numpy.packbits(stats[:, ability] >= threshold)
+
+    for column in columns.values():
+        if isinstance(column, numpy.memmap):
+            column.flush()
+    del columns  # the maps have to be closed before the file can be replaced on Windows
+    os.replace(temp, path)
+    return count
+
+
+class CharacterStore:
+    def __init__(self, path: str):
+        """
+        Opens a file made by write_store(). Nothing but the header is read until it's needed.
+        :param str path: The file.
+        """
+        with open(path, "rb") as file:
+            magic, self.count, self.first, *sizes = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} isn't a character store")
+        if sizes != [len(RACES), len(CLASSES), len(StatsGenerator.ABILITIES), len(THRESHOLDS)]:
+            raise ValueError(f"{path} was written with different races, classes or abilities")
+
+        self.path = path
+        self.columns = {}  # section name -> its memory map
+        for name, (offset, shape) in layout(self.count).items():
+            if name != "end":
+                self.columns[name] = numpy.memmap(path, numpy.uint8, "r", offset, shape) if self.count else \
+                    numpy.zeros(shape, numpy.uint8)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def bitmap(self, race: Optional[str] = None, dnd_class: Optional[str] = None,
+               minimums: Optional[Dict[str, int]] = None) -> numpy.ndarray:
+        """
+        And-s together the bitmaps of every condition.
+        :param str race: Only characters of this race, ie "Elf".
+        :param str dnd_class: Only characters of this class, ie "Wizard".
+        :param Dict[str, int] minimums: ability -> the lowest score allowed. Scores past the last threshold are
+        narrowed down by the highest bitmap, and have to be checked against the scores themselves.
+        :return: One bit per character, packed as numpy.packbits does.
+        """
+        bits = numpy.full((self.count + 7) // 8, 0xFF, dtype=numpy.uint8)
+        if self.count % 8:
+            bits[-1] = (0xFF << (8 - self.count % 8)) & 0xFF  # the bits past the last character are never set
+        if race is not None:
+            bits &= self.columns["race_index"][RACES.index(race)]
+        if dnd_class is not None:
+            bits &= self.columns["class_index"][CLASSES.index(dnd_class)]
+        for ability, score in (minimums or {}).items():
+            if score >= THRESHOLDS.start:
+                row = min(score, THRESHOLDS[-1]) - THRESHOLDS.start
+                bits &= self.columns["stat_index"][StatsGenerator.ABILITIES.index(ability), row]
+        return bits
+
+    def select(self, race: Optional[str] = None, dnd_class: Optional[str] = None,
+               minimums: Optional[Dict[str, int]] = None) -> numpy.ndarray:
+        """
+        Finds the characters meeting every condition, using only the indexes where they're enough.
+        :param str race: Only characters of this race, ie "Elf".
+        :param str dnd_class: Only characters of this class, ie "Wizard".
+        :param Dict[str, int] minimums: ability -> the lowest score allowed.
+        :return: The ids of the characters, in order.
+        """
+        bits = self.bitmap(race, dnd_class, minimums)
+        # only the bytes with a bit set are unpacked, which is few of them once a couple of conditions are combined.
+        occupied = numpy.flatnonzero(bits)
+        rows, columns = numpy.nonzero(numpy.unpackbits(bits[occupied][:, None], axis=1))
+        positions = occupied[rows] * 8 + columns
+        for ability, score in (minimums or {}).items():
+            if score > THRESHOLDS[-1]:
+                column = StatsGenerator.ABILITIES.index(ability)
+                positions = positions[self.columns["stats"][positions, column] >= score]
+        return positions + self.first
+
+    def take(self, ids: numpy.ndarray) -> CharacterBatch:
+        """
+        Reads some characters, ie the ones select() found.
+        :param numpy.ndarray ids: The characters' ids.
+        :return: A batch with the characters in the same order as ids. Its start is meaningless unless the ids follow
+        on from each other.
+        """
+        positions = numpy.asarray(ids) - self.first
+        return CharacterBatch(int(positions[0]) + self.first if len(positions) else self.first,
+                              self.columns["races"][positions], self.columns["classes"][positions],
+                              self.columns["stats"][positions])
+
+    def batch(self, start: int, stop: int) -> CharacterBatch:
+        """
+        Reads the characters with ids from start up to stop.
+        :param int start: The first id.
+        :param int stop: One past the last id.
+        :return: CharacterBatch
+        """
+        window = slice(start - self.first, stop - self.first)
+        return CharacterBatch(start, numpy.array(self.columns["races"][window]),
+                              numpy.array(self.columns["classes"][window]), numpy.array(self.columns["stats"][window]))
+
+    def character(self, character_id: int) -> Character:
+        """
+        Reads one character.
+        :param int character_id: Its id.
+        :return: Character
+        """
+        position = character_id - self.first
+        return Character(int(self.columns["races"][position]), int(self.columns["classes"][position]),
+                         self.columns["stats"][position].tobytes())